@@ -18,16 +18,43 @@
 ## Imports ##
 import sys
 import os
+import re
+import bisect
+import functools
+import importlib.util
 import csv
-from io import StringIO
+import io
+import json
+import pickle
+import shutil
+import time
+import threading
+import uuid
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlencode
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timedelta
 import logging
 from logging.handlers import TimedRotatingFileHandler
 import pandas as pd
 from pyhamtools import Callinfo, LookupLib
+from pyhamtools.version import __release__ as PYHAMTOOLS_VERSION
 import numpy as np
 
+# Optional: enables the Parquet spot store. pandas imports it when a Parquet file is
+# read or written, so only check it is installed here
+HAVE_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+try:
+    import zstandard  # Optional: lets downloads be zstd compressed
+    HAVE_ZSTD = True
+except ImportError:
+    HAVE_ZSTD = False
+
 ## Constants ##
 
 DATA_DIR         = "data"
@@ -46,14 +73,98 @@ COUNTRIES_NAME   = "WSPR_Countries"
 FMT_TEXT    = "txt"
 FMT_CSV     = "csv"
 FMT_JSON    = "json"
-
-CTY_FILE = os.path.join(RESOURCES_DIR, "cty.plist")
+FMT_PARQUET = "parquet"
+
+SPOT_STORE_FORMAT = FMT_PARQUET   # Format of the canonical spot store; falls back to CSV without pyarrow
+
+# Column types of the wspr.live spot CSV, applied when the spots are stored and read.
+# Call signs, locators and versions repeat on every spot, so they are categories, and
+# the numbers use the smallest type that holds them.
+SPOT_TIME_COLUMN = "time"
+SPOT_DTYPES = {
+    "id"         : "int64",
+    "band"       : "int16",
+    "rx_sign"    : "category",
+    "rx_lat"     : "float32",
+    "rx_lon"     : "float32",
+    "rx_loc"     : "category",
+    "tx_sign"    : "category",
+    "tx_lat"     : "float32",
+    "tx_lon"     : "float32",
+    "tx_loc"     : "category",
+    "distance"   : "int32",
+    "azimuth"    : "int16",
+    "rx_azimuth" : "int16",
+    "frequency"  : "int64",
+    "power"      : "int16",
+    "snr"        : "int16",
+    "drift"      : "int16",
+    "version"    : "category",
+    "code"       : "int16"
+}
+
+CACHE_DIR        = os.path.join(DATA_DIR, "cache")   # Spot cache, one directory per call sign and one CSV per day
+CACHE_REFETCH    = timedelta(minutes=15)            # Re-read the end of the cached range to pick up late uploads
+CACHE_RETENTION  = timedelta(days=14)               # Spots kept in the cache back from now, shared by every workspace
+MERGE_CHUNK_ROWS = 50_000                           # Downloaded spots merged into the daily buckets at a time
+
+WORKSPACE_DIR    = os.path.join(DATA_DIR, "workspaces")   # One directory per workspace, holding its config, spot store and tables
+WORKSPACE_EXPIRY = timedelta(days=30)                     # Workspaces unused for this long are removed by pruneWorkspaces
+
+# The only columns the analysis functions use
+ANALYSIS_COLUMNS = ["time", "rx_sign", "rx_loc", "distance"]
+
+# The spot columns downloaded: the analysis columns and those worth showing on the Data
+# page. wspr_downloader.php always sends every column, so a column list is selected
+# through wspr.live's ClickHouse interface (WSPR_SQL_URL) instead; None downloads every
+# column from wspr_downloader.php. id, time and tx_sign are always included, for the
+# spot cache and getDataBatch.
+FETCH_COLUMNS = ["id", "time", "band", "rx_sign", "rx_loc", "tx_sign", "tx_loc", "distance", "frequency", "power", "snr", "drift"]
+
+ANALYSIS_ENGINE  = "fused"   # "fused" builds all tables from shared codes, "staged" runs each function in turn,
+                             # "parallel" runs the functions concurrently on ANALYSIS_WORKERS threads
+ANALYSIS_WORKERS = 4         # Threads used by the "parallel" engine
+
+CTY_FILE  = os.path.join(RESOURCES_DIR, "cty.plist")
+CTY_INDEX = os.path.join(RESOURCES_DIR, "cty.pickle")   # Compiled prefix index, rebuilt when cty.plist changes
+
+COUNTRY_CACHE_SIZE    = 50000   # Decoded call signs kept in the process-wide LRU cache
+ANALYSIS_CACHE_SIZE   = 8       # analyseData results kept, one per (spot store, number of bins)
+SPOT_ORDER_CACHE_SIZE = 16      # Sort orders of the spot table kept for paging
+SPOT_TABLE_CACHE_SIZE = 4       # Spot stores (one per workspace) kept in memory for paging
+
+DATA_PAGE_SIZE        = 100    # Spots per page of the /data table
+DATA_PAGE_SIZE_MAX    = 1000   # Largest page a client may ask for
+SPOT_ROW_CHUNK        = 1000   # Spots converted to dictionaries at a time when iterating a SpotTable
+
+TIME_FORMAT           = "%Y-%m-%d %H:%M:%S"
+CALL_SIGN_PATTERN     = re.compile(r"[A-Za-z0-9/]+")   # Call signs that may be fetched or queried
+EPOCH                 = datetime(1970, 1, 1)
+
+WSPR_URL              = os.environ.get("WSPR_URL", "http://wspr.live").rstrip("/")   # Set WSPR_URL to use a stand-in server
+STREAM_CHUNK_SIZE     = 64 * 1024            # Bytes read per chunk when streaming a download
+FETCH_TIMEOUT         = (10, 120)            # Connect and read timeouts (seconds) for wspr.live
+FETCH_WORKERS         = 4                    # Background threads running fetch jobs
+FETCH_CONCURRENCY     = 8                    # Call signs fetched at once by getDataBatch, and pooled connections per host
+FETCH_RATE_LIMIT      = 4.0                  # Most requests started per second to any one host (0 for no limit)
+FETCH_SLICE           = timedelta(hours=6)   # Long windows are fetched as slices of this length, on a fixed grid
+FETCH_SLICE_WORKERS   = 4                    # Slices of one window fetched at once
+FETCH_RETRIES         = 3                    # Further attempts at a slice that failed
+FETCH_RETRY_DELAY     = 2.0                  # Seconds before the first retry, doubling for each one after
+FETCH_JOBS_KEPT       = 200                  # Finished fetch jobs remembered for status polling
+FETCH_ENCODINGS       = "zstd, gzip" if HAVE_ZSTD else "gzip"   # Compression offered for downloads (Accept-Encoding)
+
+WSPR_SQL_URL          = os.environ.get("WSPR_SQL_URL", WSPR_URL if "WSPR_URL" in os.environ else "https://db1.wspr.live").rstrip("/")   # wspr.live's ClickHouse query interface, WSPR_URL if only that is set
+QUERY_PERIOD          = timedelta(days=3)    # Periods at least this long are analysed by queries to WSPR_SQL_URL (None to always download)
+QUERY_SLOT            = timedelta(minutes=2) # Query windows end on a WSPR slot, so repeat requests share cached results
+
+METRICS_PREFIX        = "wspr_analytics"     # Prefix of the metric names served at /metrics
+METRICS_BUCKETS       = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)   # Latency histogram bounds (seconds)
 
 ## Main Code ##
 
+# The log directory is needed now; data directories are made by whatever first writes to them
 os.makedirs(LOG_DIR, exist_ok=True)        # Ensure the log directory exists
-os.makedirs(RESOURCES_DIR, exist_ok=True)  # Ensure the resources directory exists
-os.makedirs(DATA_DIR, exist_ok=True)       # Ensure the data directory exists
 
 LOG_FILE = os.path.join(LOG_DIR, "WSPR_Analytics.log")
 
@@ -86,6 +197,202 @@ logger.addHandler(file_handler)
 logger.addHandler(stream_handler)
 
 
+
+class LRUCache:
+    """
+    A bounded, thread-safe least-recently-used cache with hit/miss/eviction counters.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize   = maxsize
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+        self._items    = OrderedDict()
+        self._lock     = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def discard(self, match):
+        # Removes the entries whose key match(key) is true
+        with self._lock:
+            for key in [key for key in self._items if match(key)]:
+                del self._items[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size"      : len(self._items),
+                "maxsize"   : self.maxsize,
+                "hits"      : self.hits,
+                "misses"    : self.misses,
+                "evictions" : self.evictions
+            }
+
+
+class StageMetrics:
+    """
+    Thread-safe latency histograms and row, byte and error counters, one set per stage.
+    """
+
+    def __init__(self, buckets=METRICS_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._stages = {}
+        self._lock   = threading.Lock()
+
+    def record(self, stage, seconds, rows=None, size=None, failed=False, wire_size=None):
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                entry = self._stages[stage] = {
+                    "buckets"    : [0] * (len(self.buckets) + 1),   # The last counts calls slower than every bound
+                    "count"      : 0,
+                    "seconds"    : 0.0,
+                    "rows"       : 0,
+                    "bytes"      : 0,
+                    "wire_bytes" : 0,
+                    "errors"     : 0
+                }
+            entry["buckets"][bisect.bisect_left(self.buckets, seconds)] += 1
+            entry["count"]      += 1
+            entry["seconds"]    += seconds
+            entry["rows"]       += rows or 0
+            entry["bytes"]      += size or 0
+            entry["wire_bytes"] += wire_size or 0
+            entry["errors"]     += bool(failed)
+
+    def clear(self):
+        with self._lock:
+            self._stages.clear()
+
+    def stats(self):
+        with self._lock:
+            return {stage: dict(entry, buckets=list(entry["buckets"])) for stage, entry in self._stages.items()}
+
+
+_stage_metrics = StageMetrics()
+
+
+@contextmanager
+def measureStage(stage):
+    """
+    Records the enclosed block as one call of stage.
+
+    Set "rows" and "bytes" in the yielded dict to count the rows and bytes the call
+    handled, "wire_bytes" to count the bytes it received before decoding, and "error"
+    if it failed without raising. An exception counts as an error.
+    """
+    counts = {"rows": None, "bytes": None, "wire_bytes": None, "error": False}
+    start = time.perf_counter()
+    try:
+        yield counts
+    except BaseException:
+        counts["error"] = True
+        raise
+    finally:
+        _stage_metrics.record(stage, time.perf_counter() - start, counts["rows"], counts["bytes"], counts["error"], counts["wire_bytes"])
+
+
+def instrumented(stage, rows=None):
+    """
+    Decorator recording each call of a function as a call of stage.
+
+    rows(args, result), if given, counts the rows a call handled; otherwise a DataFrame
+    first argument is counted. A call fails if it raises, or if it returns a tuple
+    ending in an error message, as getData and analyseData do.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with measureStage(stage) as counts:
+                result = function(*args, **kwargs)
+                if rows is not None:
+                    counts["rows"] = rows(args, result)
+                elif args and isinstance(args[0], pd.DataFrame):
+                    counts["rows"] = len(args[0])
+                counts["error"] = isinstance(result, tuple) and bool(result) and isinstance(result[-1], str)
+                return result
+        return wrapper
+    return decorator
+
+
+def _label_value(value):
+    # Escapes a label value for the Prometheus text format
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _metric_lines(name, kind, help_text, samples):
+    # One metric family in the Prometheus text format; samples are (suffix, labels, value)
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for suffix, labels, value in samples:
+        label_text = ",".join(f'{key}="{_label_value(label)}"' for key, label in labels.items())
+        lines.append(f"{name}{suffix}{{{label_text}}} {value}")
+    return lines
+
+
+def metricsText():
+    """
+    Returns the stage metrics, and the counters of the caches, in the Prometheus text
+    exposition format served at /metrics.
+    """
+    stages = _stage_metrics.stats()
+    bounds = [f"{bound:g}" for bound in _stage_metrics.buckets] + ["+Inf"]
+
+    histogram = []
+    for stage, entry in stages.items():
+        total = 0
+        for bound, count in zip(bounds, entry["buckets"]):
+            total += count
+            histogram.append(("_bucket", {"stage": stage, "le": bound}, total))
+        histogram.append(("_sum", {"stage": stage}, repr(entry["seconds"])))
+        histogram.append(("_count", {"stage": stage}, entry["count"]))
+
+    lines = _metric_lines(f"{METRICS_PREFIX}_stage_seconds", "histogram", "Time taken by each call of a stage.", histogram)
+    for key, help_text in (
+        ("errors", "Calls of a stage that failed."),
+        ("rows", "Rows handled by a stage."),
+        ("bytes", "Bytes received (after decoding), read or written by a stage."),
+        ("wire_bytes", "Bytes received over the network by a stage, before decoding.")
+    ):
+        samples = [("", {"stage": stage}, entry[key]) for stage, entry in stages.items()]
+        lines += _metric_lines(f"{METRICS_PREFIX}_stage_{key}_total", "counter", help_text, samples)
+
+    caches = {
+        "country"    : _callsign_cache.stats(),
+        "analysis"   : _analysis_cache.stats(),
+        "spot_order" : _spot_order_cache.stats()
+    }
+    for key, kind, help_text in (
+        ("hits", "counter", "Lookups found in a cache."),
+        ("misses", "counter", "Lookups not found in a cache."),
+        ("evictions", "counter", "Entries evicted from a cache."),
+        ("size", "gauge", "Entries held in a cache.")
+    ):
+        name = f"{METRICS_PREFIX}_cache_{key}" + ("_total" if kind == "counter" else "")
+        lines += _metric_lines(name, kind, help_text, [("", {"cache": cache}, stats[key]) for cache, stats in caches.items()])
+
+    return "\n".join(lines) + "\n"
+
+
     
 def parse_time_period(time_period_str):
     """Parse a time period string like '10 minutes' into a timedelta."""
@@ -118,6 +425,18 @@ def saveData(data, filename, directory="data", format="csv", **kwargs):
         **kwargs: Additional keyword arguments to pass to the underlying
                   saving function (e.g., index=False for DataFrames).
     """
+    with measureStage("saveData") as stage:
+        saved, error = _write_data(data, filename, directory, format, **kwargs)
+        if isinstance(data, (pd.DataFrame, list)):
+            stage["rows"] = len(data)
+        if saved:
+            stage["bytes"] = os.path.getsize(os.path.join(directory, f"{filename}.{format}"))
+        stage["error"] = error is not None
+        return saved, error
+
+
+def _write_data(data, filename, directory, format, **kwargs):
+    # Writes data for saveData, returning (saved, error)
     os.makedirs(directory, exist_ok=True)  # Create directory if it doesn't exist
     file_path = os.path.join(directory, f"{filename}.{format}")
 
@@ -166,46 +485,1122 @@ def saveData(data, filename, directory="data", format="csv", **kwargs):
 
 
 
-def getData(call_sign, time_period_str):
+class RateLimiter:
+    """
+    Spaces out calls to wait() so no more than rate of them return per second.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next    = 0.0
+        self._lock    = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        # Reserve the next slot under the lock, then sleep until it outside it
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# One keep-alive session shared by every fetch, and one rate limiter per host
+_http_session_obj = None
+_rate_limiters    = {}
+_http_lock        = threading.Lock()
+
+
+def _http_session():
+    global _http_session_obj
+    with _http_lock:
+        if _http_session_obj is None:
+            # Every fetch job or getDataBatch worker may fetch FETCH_SLICE_WORKERS slices at once
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(FETCH_CONCURRENCY, FETCH_WORKERS) * FETCH_SLICE_WORKERS)
+            _http_session_obj = requests.Session()
+            _http_session_obj.mount("http://", adapter)
+            _http_session_obj.mount("https://", adapter)
+        return _http_session_obj
+
+
+def _rate_limiter(url):
+    host = urlsplit(url).netloc
+    with _http_lock:
+        return _rate_limiters.setdefault(host, RateLimiter(FETCH_RATE_LIMIT))
+
+
+def validCallSign(call_sign):
+    """Returns True if call_sign can be looked up: letters, digits and /, as in G4ABC/P."""
+    return isinstance(call_sign, str) and CALL_SIGN_PATTERN.fullmatch(call_sign) is not None
+
+
+def _spot_filter(call_sign, start_time, end_time):
+    # The WHERE clause selecting a call sign's spots between two times
+    if not validCallSign(call_sign):
+        raise ValueError(f"Invalid call sign: {call_sign}")
+    return (
+        f"tx_sign = '{call_sign.upper()}' "
+        f"AND time >= '{start_time.strftime(TIME_FORMAT)}' AND time <= '{end_time.strftime(TIME_FORMAT)}'"
+    )
+
+
+def _fetch_columns():
+    # FETCH_COLUMNS in wspr.live's column order, with the columns the spot cache relies
+    # on, or None to download every column
+    if FETCH_COLUMNS is None:
+        return None
+    schema = ["id", SPOT_TIME_COLUMN] + [column for column in SPOT_DTYPES if column != "id"]
+    unknown = set(FETCH_COLUMNS) - set(schema)
+    if unknown:
+        raise ValueError(f"Unknown spot columns in FETCH_COLUMNS: {sorted(unknown)}")
+    wanted = set(FETCH_COLUMNS) | {"id", SPOT_TIME_COLUMN, "tx_sign"}
+    return [column for column in schema if column in wanted]
+
+
+def _decoded_stream(response):
+    # Yields (bytes on the wire, decoded bytes) for each chunk of a streamed response,
+    # undoing its Content-Encoding as it arrives
+    encoding = response.headers.get("Content-Encoding", "identity").strip().lower()
+    if encoding in ("", "identity"):
+        decoder = None
+    elif encoding in ("gzip", "x-gzip", "deflate"):
+        decoder = zlib.decompressobj(wbits=47)   # Accepts a gzip or zlib header
+    elif encoding == "zstd" and HAVE_ZSTD:
+        decoder = zstandard.ZstdDecompressor().decompressobj()
+    else:
+        raise requests.exceptions.ContentDecodingError(f"Unsupported Content-Encoding: {encoding}")
+
+    for wire_chunk in response.raw.stream(STREAM_CHUNK_SIZE, decode_content=False):
+        yield len(wire_chunk), decoder.decompress(wire_chunk) if decoder else wire_chunk
+    if decoder:
+        yield 0, decoder.flush()
+
+
+# The spots of a call sign in a time window, for fetchSpots when FETCH_COLUMNS is set
+SPOT_QUERY = "SELECT {columns} FROM wspr.rx WHERE {where} ORDER BY time, id FORMAT CSVWithNames"
+
+
+def fetchSpots(call_sign, start_time, end_time, file_path, progress=None, rate_limit=True):
+    """
+    Streams the wspr.live spots for a call sign and time range into a CSV file.
+
+    Only the FETCH_COLUMNS are requested, through the ClickHouse interface, unless it
+    is None. The response may be compressed with any of FETCH_ENCODINGS, and is decoded
+    and written in chunks as it arrives; file_path is only replaced once the download
+    has completed. The bytes received on the wire and after decoding are both recorded.
+    If given, progress(bytes, rows) is called with the decoded size and number of spot
+    rows (line ends, less the header) of each chunk. Requests go over a shared
+    keep-alive session, and are spaced out to FETCH_RATE_LIMIT per host unless
+    rate_limit is False.
+
+    Returns:
+        int: The number of bytes received, after decoding.
+
+    Raises:
+        requests.RequestException: The download failed.
+    """
+    columns = _fetch_columns()
+    if columns is None:
+        start_str = start_time.strftime(TIME_FORMAT)
+        end_str = end_time.strftime(TIME_FORMAT)
+        query_url = (
+            f"{WSPR_URL}/wspr_downloader.php?"
+            f"start={start_str}&end={end_str}&tx_sign={call_sign}&rx_sign=%&format=CSV"
+        )
+    else:
+        sql = SPOT_QUERY.format(columns=", ".join(columns), where=_spot_filter(call_sign, start_time, end_time))
+        query_url = f"{WSPR_SQL_URL}/?" + urlencode({"query": sql, "enable_http_compression": 1})
+    logger.debug(f"Query URL: {query_url}")
+
+    part_path = f"{file_path}.part"
+    bytes_received = 0
+    wire_bytes = 0
+    lines_received = 0
+    with measureStage("fetchSpots") as stage:
+        try:
+            if rate_limit:
+                _rate_limiter(query_url).wait()
+            headers = {"Accept-Encoding": FETCH_ENCODINGS}
+            with _http_session().get(query_url, stream=True, timeout=FETCH_TIMEOUT, headers=headers) as response:
+                response.raise_for_status()
+                encoding = response.headers.get("Content-Encoding", "identity")
+                with open(part_path, "wb") as f:
+                    for wire_size, chunk in _decoded_stream(response):
+                        wire_bytes += wire_size
+                        if not chunk:
+                            continue
+                        f.write(chunk)
+                        lines = chunk.count(b"\n")
+                        bytes_received += len(chunk)
+                        if progress:
+                            # The first line end of the download closes the header
+                            progress(len(chunk), lines - 1 if lines and not lines_received else lines)
+                        lines_received += lines
+            os.replace(part_path, file_path)
+        finally:
+            stage["rows"] = max(lines_received - 1, 0)   # Less the header
+            stage["bytes"] = bytes_received
+            stage["wire_bytes"] = wire_bytes
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+    logger.debug(f"fetchSpots: {bytes_received} bytes ({wire_bytes} on the wire, {encoding}) saved to {file_path}")
+    return bytes_received
+
+
+def _time_slices(start_time, end_time, slice_length=None):
+    # Splits start_time..end_time at multiples of slice_length (default FETCH_SLICE) since
+    # the epoch, so the slices of overlapping windows line up
+    slice_length = slice_length or FETCH_SLICE
+    if not slice_length:
+        return [(start_time, end_time)]
+    slices = []
+    slice_start = start_time
+    while True:
+        slice_end = slice_start - (slice_start - EPOCH) % slice_length + slice_length
+        if slice_end >= end_time:
+            slices.append((slice_start, end_time))
+            return slices
+        slices.append((slice_start, slice_end))
+        slice_start = slice_end
+
+
+def _fetch_slice(call_sign, start_time, end_time, file_path, progress):
+    # Fetches one slice, retrying with a doubling delay, unless a complete copy was kept
+    # from an earlier, interrupted fetch. A copy is complete if it was downloaded after
+    # the late uploads for the end of its slice were in.
+    settled = (end_time + CACHE_REFETCH - EPOCH).total_seconds()
+    if os.path.exists(file_path) and os.path.getmtime(file_path) >= settled:
+        logger.debug(f"_fetch_slice: Reusing {file_path}")
+        return
+
+    for attempt in range(FETCH_RETRIES + 1):
+        try:
+            fetchSpots(call_sign, start_time, end_time, file_path, progress, rate_limit=False)
+            return
+        except requests.RequestException as e:
+            if attempt == FETCH_RETRIES:
+                raise
+            delay = FETCH_RETRY_DELAY * 2 ** attempt
+            logger.warning(f"Fetching {call_sign} {start_time} - {end_time} failed ({e}), retrying in {delay}s")
+            time.sleep(delay)
+
+
+def fetchSpotSlices(call_sign, start_time, end_time, directory, file_path, progress=None):
+    """
+    Fetches the spots for a call sign and time range as FETCH_SLICE slices, up to
+    FETCH_SLICE_WORKERS at once, and joins them into one CSV file.
+
+    Each slice is retried on its own, and is kept in directory/slices until the whole
+    range has been fetched, so a fetch that fails part way through resumes without
+    downloading the finished slices again. The range counts once against
+    FETCH_RATE_LIMIT, however many slices it has.
+
+    Returns:
+        int: The number of slices fetched.
+
+    Raises:
+        requests.RequestException: A slice still failed after FETCH_RETRIES retries.
+    """
+    slice_dir = os.path.join(directory, "slices")
+    os.makedirs(slice_dir, exist_ok=True)
+    columns = _fetch_columns()
+    tag = "" if columns is None else f"_{zlib.crc32(','.join(columns).encode('utf-8')):08x}"   # Slices kept with other columns aren't reused
+    slices = [
+        (slice_start, slice_end, os.path.join(slice_dir, f"{slice_start:%Y%m%dT%H%M%S}_{slice_end:%Y%m%dT%H%M%S}{tag}.csv"))
+        for slice_start, slice_end in _time_slices(start_time, end_time)
+    ]
+
+    _rate_limiter(WSPR_URL if columns is None else WSPR_SQL_URL).wait()
+    with ThreadPoolExecutor(max_workers=max(1, min(FETCH_SLICE_WORKERS, len(slices))), thread_name_prefix="slice") as pool:
+        futures = [pool.submit(_fetch_slice, call_sign, *slice_range, progress) for slice_range in slices]
+        for future in futures:
+            future.result()
+
+    # Join the slices, keeping the header of the first one with any content
+    with open(file_path, "wb") as out:
+        header = None
+        for _, _, slice_path in slices:
+            with open(slice_path, "rb") as f:
+                first_line = f.readline()
+                if not first_line:
+                    continue
+                if header is None:
+                    header = first_line
+                    out.write(header)
+                shutil.copyfileobj(f, out)
+
+    logger.debug(f"fetchSpotSlices: {len(slices)} slices joined into {file_path}")
+    return len(slices)
+
+
+def _clear_slices(directory):
+    slice_dir = os.path.join(directory, "slices")
+    if os.path.isdir(slice_dir):
+        shutil.rmtree(slice_dir)
+
+
+# One lock per call sign, so concurrent fetches don't interleave cache updates
+_cache_locks      = {}
+_cache_locks_lock = threading.Lock()
+
+
+def _spot_cache_lock(call_sign):
+    with _cache_locks_lock:
+        return _cache_locks.setdefault(call_sign.upper(), threading.Lock())
+
+
+# One lock per directory, so only one fetch at a time writes its spot store. Taken
+# before a call sign's cache lock, never while holding one
+_store_locks = {}
+
+
+def _spot_store_lock(directory):
+    with _cache_locks_lock:
+        return _store_locks.setdefault(os.path.normpath(directory), threading.Lock())
+
+
+def spotCacheDir(call_sign, cache_dir=CACHE_DIR):
+    """Returns the spot cache directory of a call sign, the same in any case."""
+    return os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_-]", "_", call_sign.upper()))
+
+
+def _read_coverage(directory, columns=None):
+    # Returns the (start, end) time range held in a cache directory, or None if there
+    # is none or it holds other columns (None for every column)
+    try:
+        with open(os.path.join(directory, "coverage.json"), "r", encoding="utf-8") as f:
+            coverage = json.load(f)
+        if coverage.get("columns") != columns:
+            return None
+        return (datetime.strptime(coverage["start"], TIME_FORMAT),
+                datetime.strptime(coverage["end"], TIME_FORMAT))
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _write_coverage(directory, start_time, end_time, columns=None):
+    with open(os.path.join(directory, "coverage.json"), "w", encoding="utf-8") as f:
+        json.dump({"start": start_time.strftime(TIME_FORMAT), "end": end_time.strftime(TIME_FORMAT), "columns": columns}, f)
+
+
+def _bucket_files(directory):
+    # Daily bucket files (YYYY-MM-DD.csv) in date order
+    return sorted(name for name in os.listdir(directory) if re.fullmatch(r"\d{4}-\d{2}-\d{2}\.csv", name))
+
+
+def _merge_day(directory, day, day_spots):
+    # Merges one day's new spots into its bucket, replacing any spots already held
+    bucket_path = os.path.join(directory, f"{day}.csv")
+    if os.path.exists(bucket_path):
+        cached = pd.read_csv(bucket_path, dtype=str, keep_default_na=False)
+        day_spots = pd.concat([cached, day_spots], ignore_index=True)
+
+    key = ["id"] if "id" in day_spots.columns else None
+    day_spots = day_spots.drop_duplicates(subset=key, keep="last").sort_values("time", kind="stable")
+
+    day_spots.to_csv(f"{bucket_path}.part", index=False)
+    os.replace(f"{bucket_path}.part", bucket_path)
+
+
+def _merge_into_buckets(directory, delta_path):
+    # Merges newly fetched spots into the daily buckets, MERGE_CHUNK_ROWS spots at a
+    # time, so at most a chunk and a day of spots are held however long the window
+    if os.path.getsize(delta_path) == 0:
+        return 0
+
+    merged = 0
+    pending = None   # Spots of the last day seen, which the next chunk may continue
+
+    # Keep every value as the exact text wspr.live sent
+    for chunk in pd.read_csv(delta_path, dtype=str, keep_default_na=False, chunksize=MERGE_CHUNK_ROWS):
+        merged += len(chunk)
+        if pending is not None:
+            chunk = pd.concat([pending, chunk], ignore_index=True)
+
+        days = chunk["time"].str[:10]
+        last_day = days.iloc[-1]
+        pending = chunk[days == last_day]
+        for day, day_spots in chunk[days != last_day].groupby(days[days != last_day]):
+            _merge_day(directory, day, day_spots)
+
+    if pending is not None and len(pending):
+        _merge_day(directory, pending["time"].iloc[0][:10], pending)
+
+    return merged
+
+
+def updateSpotCache(call_sign, start_time, end_time, progress=None):
+    """
+    Brings the spot cache of a call sign up to date for a time window.
+
+    If the cache already overlaps the window, with the same FETCH_COLUMNS, only the
+    missing head (from the start of the window to the start of the cache) and the
+    missing tail (from the end of the cache, less CACHE_REFETCH, up to end_time) are
+    fetched; otherwise the cache is cleared and the whole window fetched. Each range is
+    fetched in slices by fetchSpotSlices. Daily buckets older than CACHE_RETENTION (or
+    the window, if that is longer) are evicted, so a short window doesn't evict the
+    spots a longer one still needs. progress is passed on to fetchSpots.
+
+    Returns:
+        str: The call sign's cache directory.
+
+    Raises:
+        requests.RequestException: The download failed.
+    """
+    directory = spotCacheDir(call_sign)
+    os.makedirs(directory, exist_ok=True)
+
+    columns = _fetch_columns()
+    coverage = _read_coverage(directory, columns)
+    if coverage and start_time <= coverage[1]:
+        cached_start = min(start_time, coverage[0])
+        cached_end = max(end_time, coverage[1])
+        ranges = [(start_time, coverage[0])] if start_time < coverage[0] else []
+        ranges.append((max(start_time, coverage[1] - CACHE_REFETCH), end_time))
+        logger.debug(f"updateSpotCache: {call_sign} cached from {coverage[0]} to {coverage[1]}, fetching {ranges}")
+    else:
+        # Nothing usable cached, so start again with the whole window
+        if os.path.exists(os.path.join(directory, "coverage.json")):
+            os.remove(os.path.join(directory, "coverage.json"))
+        for name in _bucket_files(directory):
+            os.remove(os.path.join(directory, name))
+        cached_start = start_time
+        cached_end = end_time
+        ranges = [(start_time, end_time)]
+        logger.debug(f"updateSpotCache: {call_sign} not cached, fetching from {start_time}")
+
+    merged = 0
+    delta_path = os.path.join(directory, "delta.csv")
+    for fetch_start, fetch_end in ranges:
+        fetchSpotSlices(call_sign, fetch_start, fetch_end, directory, delta_path, progress)
+        try:
+            merged += _merge_into_buckets(directory, delta_path)
+            _clear_slices(directory)
+        finally:
+            os.remove(delta_path)
+
+    # Evict the buckets from days before the retention period (and the window)
+    first_day = min(start_time, end_time - CACHE_RETENTION).strftime("%Y-%m-%d")
+    for name in _bucket_files(directory):
+        if name[:10] < first_day:
+            os.remove(os.path.join(directory, name))
+    cached_start = max(cached_start, datetime.strptime(first_day, "%Y-%m-%d"))
+
+    _write_coverage(directory, cached_start, cached_end, columns)
+    logger.debug(f"updateSpotCache: {merged} spots merged, cache covers {cached_start} to {cached_end}")
+
+    return directory
+
+
+def readSpotCache(call_sign, start_time, end_time, file_path):
+    """
+    Writes the cached spots of a call sign within a time window to a CSV file.
+
+    The daily buckets are read and filtered row by row, so memory use doesn't
+    grow with the size of the buckets.
+
+    Returns:
+        int: The number of spots written.
+    """
+    directory = spotCacheDir(call_sign)
+    start_str = start_time.strftime(TIME_FORMAT)
+    end_str = end_time.strftime(TIME_FORMAT)
+
+    num_rows = 0
+    part_path = f"{file_path}.part"
+    try:
+        with open(part_path, "w", newline="", encoding="utf-8") as out:
+            writer = None
+            for name in _bucket_files(directory):
+                if not (start_str[:10] <= name[:10] <= end_str[:10]):
+                    continue
+                with open(os.path.join(directory, name), "r", newline="", encoding="utf-8") as f:
+                    reader = csv.DictReader(f)
+                    if writer is None:
+                        writer = csv.DictWriter(out, fieldnames=reader.fieldnames, extrasaction="ignore")
+                        writer.writeheader()
+                    for row in reader:
+                        if start_str <= row["time"] <= end_str:
+                            writer.writerow(row)
+                            num_rows += 1
+        os.replace(part_path, file_path)
+    finally:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+    return num_rows
+
+
+@instrumented("getData", rows=lambda args, result: len(result[0] or ()))
+def getData(call_sign, time_period_str, progress=None, directory=DATA_DIR, superseded=None):
+    """
+    Brings the call sign's spot cache up to date for the period up to now and
+    stores the spots in the window as the spot table in directory.
+
+    Only one fetch at a time stores its spots in a directory. If superseded is given
+    and returns True once the cache is up to date, a newer fetch owns the directory,
+    so its spot store is left alone.
+
+    Returns:
+        tuple: (SpotTable of the spots, or None, error message or None)
+    """
     logger.debug(f"Starting data fetch for Call Sign: {call_sign}, Time Period: {time_period_str}")
+    if not validCallSign(call_sign):
+        logger.error(f"Invalid call sign: {call_sign}")
+        return None, f"Invalid call sign: {call_sign}"
+    call_sign = call_sign.upper()   # wspr.live matches upper case, and the spot cache is kept under it
+
     try:
         delta = parse_time_period(time_period_str)
     except Exception as e:
         logger.error(f"Error parsing time period: {e}")
         return None, f"Error parsing time period: {e}"
 
-    end_time = datetime.utcnow()
+    end_time = datetime.utcnow().replace(microsecond=0)
     start_time = end_time - delta
-    start_str = start_time.strftime("%Y-%m-%d %H:%M:%S")
-    end_str = end_time.strftime("%Y-%m-%d %H:%M:%S")
-    query_url = (
-        f"http://wspr.live/wspr_downloader.php?"
-        f"start={start_str}&end={end_str}&tx_sign={call_sign}&rx_sign=%&format=CSV"
-    )
-    logger.debug(f"Query URL: {query_url}")
+
+    os.makedirs(directory, exist_ok=True)
+    file_path = os.path.join(directory, f"{DATAFILE_NAME}.{FMT_CSV}")
+
+    # Fetch only what the call sign's spot cache is missing
     try:
-        response = requests.get(query_url)
-        response.raise_for_status()
-        logger.debug("Data fetched successfully from API.")
-    except Exception as e:
+        with _spot_cache_lock(call_sign):
+            updateSpotCache(call_sign, start_time, end_time, progress)
+    except requests.RequestException as e:
         logger.error(f"Failed to fetch data: {e}")
         return None, f"Failed to fetch data: {e}"
-
-    saveData(response.text, DATAFILE_NAME, DATA_DIR, FMT_CSV)
-    
-    # Parse CSV and return as table data
-    try:
-        csv_file = StringIO(response.text)
-        reader = csv.DictReader(csv_file)
-        data_rows = list(reader)
-        if not data_rows:
-            return None, "No data returned for this period and call sign."
-        return data_rows, None
     except Exception as e:
         logger.error(f"Failed to parse CSV: {e}")
         return None, f"Failed to parse CSV: {e}"
-   
-def getSummary(Data):
+
+    # Then write out the window and store it, unless a newer fetch owns the directory
+    with _spot_store_lock(directory):
+        if superseded is not None and superseded():
+            logger.debug(f"getData: {call_sign} superseded, leaving {directory} alone")
+            return None, "Superseded by a newer fetch for this workspace."
+
+        with _spot_cache_lock(call_sign):
+            num_rows = readSpotCache(call_sign, start_time, end_time, file_path)
+        logger.debug(f"Data fetched successfully: {num_rows} rows saved to {file_path}")
+        if not num_rows:
+            return None, "No data returned for this period and call sign."
+
+        storeSpots(file_path, directory)
+        _spots_changed(directory)
+
+        # Read back typed, and keep for /data so the first page doesn't read the store again
+        spots = readSpots(directory=directory)
+        _spot_table_cache.put(spotStoreFingerprint(directory), spots)
+
+    table = SpotTable(spots)
+    logger.debug(f"getData: {len(table)} spots held in {table.memoryUsage()} bytes")
+
+    return table, None
+
+
+def readCacheWindow(call_sign, start_time, end_time):
+    """
+    Returns the cached spots of a call sign within a time window as a typed DataFrame.
+    """
+    directory = spotCacheDir(call_sign)
+    start_str = start_time.strftime(TIME_FORMAT)
+    end_str = end_time.strftime(TIME_FORMAT)
+
+    days = []
+    for name in _bucket_files(directory):
+        if start_str[:10] <= name[:10] <= end_str[:10]:
+            day = pd.read_csv(os.path.join(directory, name), dtype=str)
+            days.append(day[(day["time"] >= start_str) & (day["time"] <= end_str)])
+    if not days:
+        return pd.DataFrame()
+
+    return _typed_spots(pd.concat(days, ignore_index=True))
+
+
+def getDataBatch(call_signs, time_period_str, max_concurrency=FETCH_CONCURRENCY, progress=None, directory=DATA_DIR):
+    """
+    Fetches the spots of several call signs over the same time window and stores
+    them as one spot table, which the tx_sign column tells apart.
+
+    Each call sign's spot cache is brought up to date as in getData, with up to
+    max_concurrency downloads at once over the shared session. A call sign that
+    fails doesn't stop the others. Call signs are fetched, and their failures
+    named, in upper case.
+
+    Args:
+        call_signs (list): The call signs to fetch.
+        time_period_str (str): The period, e.g. '1 day'.
+        max_concurrency (int, optional): Most call signs fetched at the same time.
+        progress (callable, optional): Passed on to fetchSpots for every call sign.
+        directory (str, optional): The directory to store the spot table in.
+
+    Returns:
+        tuple: (spots DataFrame sorted by time, or None, {call sign: error} for the failures)
+    """
+    logger.debug(f"Starting batch fetch for Call Signs: {call_signs}, Time Period: {time_period_str}")
+    try:
+        delta = parse_time_period(time_period_str)
+    except Exception as e:
+        logger.error(f"Error parsing time period: {e}")
+        return None, {call_sign: f"Error parsing time period: {e}" for call_sign in call_signs}
+
+    # One window for every call sign, so the merged table lines up
+    end_time = datetime.utcnow().replace(microsecond=0)
+    start_time = end_time - delta
+    errors = {call_sign: f"Invalid call sign: {call_sign}" for call_sign in call_signs if not validCallSign(call_sign)}
+    call_signs = list(dict.fromkeys(call_sign.upper() for call_sign in call_signs if call_sign not in errors))
+
+    def fetch_one(call_sign):
+        with _spot_cache_lock(call_sign):
+            updateSpotCache(call_sign, start_time, end_time, progress)
+            spots = readCacheWindow(call_sign, start_time, end_time)
+        if len(spots) and "tx_sign" not in spots.columns:
+            spots["tx_sign"] = call_sign
+        return spots
+
+    tables = []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(call_signs))), thread_name_prefix="batch") as pool:
+        futures = {call_sign: pool.submit(fetch_one, call_sign) for call_sign in call_signs}
+        for call_sign, future in futures.items():
+            try:
+                spots = future.result()
+                logger.debug(f"getDataBatch: {len(spots)} spots for {call_sign}")
+                if len(spots):
+                    tables.append(spots)
+            except requests.RequestException as e:
+                logger.error(f"Failed to fetch data for {call_sign}: {e}")
+                errors[call_sign] = f"Failed to fetch data: {e}"
+            except Exception as e:
+                logger.error(f"Failed to parse CSV for {call_sign}: {e}")
+                errors[call_sign] = f"Failed to parse CSV: {e}"
+
+    if not tables:
+        return None, errors
+
+    # Call signs' categories differ, so the merged columns are typed again
+    spots = pd.concat(tables, ignore_index=True).sort_values(SPOT_TIME_COLUMN, kind="stable", ignore_index=True)
+    spots = _typed_spots(spots)
+
+    os.makedirs(directory, exist_ok=True)
+    with _spot_store_lock(directory):
+        storeSpotTable(spots, directory)
+        _spots_changed(directory)
+
+    logger.debug(f"getDataBatch: {len(spots)} spots stored for {len(tables)} call signs")
+    return spots, errors
+
+
+def _spots_changed(directory=DATA_DIR):
+    # Results for the directory's old spots can never be asked for again. The cache
+    # keys are, or start with, a spot store fingerprint (path, mtime, size)
+    directory = os.path.normpath(directory)
+
+    def stale(key):
+        fingerprint = key[0] if isinstance(key[0], tuple) else key
+        return os.path.dirname(os.path.normpath(str(fingerprint[0]))) == directory
+
+    _analysis_cache.discard(stale)
+    _spot_table_cache.discard(stale)
+    _spot_order_cache.discard(stale)
+
+
+class FetchJob:
+    """
+    A getData call run on the background fetch pool, with its progress for polling.
+    """
+
+    def __init__(self, call_sign, time_period_str, directory=DATA_DIR):
+        self.job_id         = uuid.uuid4().hex
+        self.call_sign      = call_sign
+        self.period         = time_period_str
+        self.directory      = directory
+        self.status         = "queued"   # queued, running, done or failed
+        self.bytes_received = 0
+        self.rows_received  = 0
+        self.rows           = None
+        self.error          = None
+        self.created        = datetime.utcnow()
+        self.finished       = None
+        self.done           = threading.Event()
+        self._lock          = threading.Lock()
+
+    def progress(self, num_bytes, num_rows):
+        # Called from every slice being fetched
+        with self._lock:
+            self.bytes_received += num_bytes
+            self.rows_received  += num_rows
+
+    def run(self):
+        self.status = "running"
+        try:
+            spots, self.error = getData(self.call_sign, self.period, self.progress, self.directory, self.superseded)
+            self.rows = len(spots) if spots else 0
+        except Exception as e:
+            logger.error(f"Fetch job {self.job_id} failed: {e}")
+            self.error = f"Failed to fetch data: {e}"
+        finally:
+            self.status = "failed" if self.error else "done"
+            self.finished = datetime.utcnow()
+            with _fetch_jobs_lock:
+                if _active_fetches.get(self._key()) is self:
+                    del _active_fetches[self._key()]
+                if _newest_fetches.get(self.directory) is self:
+                    del _newest_fetches[self.directory]
+            self.done.set()
+        logger.debug(f"Fetch job {self.job_id} {self.status}: {self.rows} rows, {self.bytes_received} bytes")
+
+    def superseded(self):
+        # True once a later job has been submitted for the same directory. A superseded
+        # job can't be joined any more, as it won't store its spots
+        with _fetch_jobs_lock:
+            if _newest_fetches.get(self.directory) is self:
+                return False
+            if _active_fetches.get(self._key()) is self:
+                del _active_fetches[self._key()]
+            return True
+
+    def info(self):
+        return {
+            "job_id"         : self.job_id,
+            "call_sign"      : self.call_sign,
+            "period"         : self.period,
+            "status"         : self.status,
+            "bytes_received" : self.bytes_received,
+            "rows_received"  : self.rows if self.rows is not None else self.rows_received,
+            "rows"           : self.rows,
+            "error"          : self.error,
+            "created"        : self.created.strftime(TIME_FORMAT),
+            "finished"       : self.finished.strftime(TIME_FORMAT) if self.finished else None
+        }
+
+    def _key(self):
+        return self.call_sign.upper(), self.period, self.directory
+
+
+# Background fetches: every job by id (bounded), the queued or running job per call sign,
+# period and directory, and the last job submitted for each directory while it is unfinished
+_fetch_jobs      = LRUCache(FETCH_JOBS_KEPT)
+_active_fetches  = {}
+_newest_fetches  = {}
+_fetch_jobs_lock = threading.Lock()
+_fetch_pool      = None
+
+
+def submitFetch(call_sign, time_period_str, directory=DATA_DIR):
+    """
+    Queues getData(call_sign, time_period_str, directory=directory) on the background
+    fetch pool.
+
+    A request for a call sign and period that is already queued or running for the
+    same directory joins that job rather than starting a second download. Jobs for
+    other directories share the spot cache, so only the first of them downloads.
+    Only the last job submitted for a directory stores its spots there; any earlier
+    job still running finishes its download for the cache, then fails as superseded.
+
+    Returns:
+        FetchJob: The new or joined job.
+    """
+    global _fetch_pool
+    key = (call_sign.upper(), time_period_str, directory)
+
+    with _fetch_jobs_lock:
+        job = _active_fetches.get(key)
+        if job is not None:
+            _newest_fetches[directory] = job
+            logger.debug(f"submitFetch: Joining fetch job {job.job_id} for {call_sign}, {time_period_str}")
+            return job
+
+        job = FetchJob(call_sign, time_period_str, directory)
+        _active_fetches[key] = job
+        _newest_fetches[directory] = job
+        _fetch_jobs.put(job.job_id, job)
+        if _fetch_pool is None:
+            _fetch_pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="fetch")
+        _fetch_pool.submit(job.run)
+
+    logger.debug(f"submitFetch: Queued fetch job {job.job_id} for {call_sign}, {time_period_str}")
+    return job
+
+
+def getFetchJob(job_id):
+    """Returns the fetch job with this id, or None if it is unknown or has been forgotten."""
+    return _fetch_jobs.get(job_id)
+
+
+# Workspace ids are uuid4 hex strings, so they are safe to use as directory names
+WORKSPACE_ID = re.compile(r"[0-9a-f]{32}")
+
+
+def newWorkspace():
+    """Returns the id of a new, empty workspace."""
+    workspace_id = uuid.uuid4().hex
+    os.makedirs(os.path.join(WORKSPACE_DIR, workspace_id), exist_ok=True)
+    logger.debug(f"newWorkspace: {workspace_id}")
+    return workspace_id
+
+
+def workspaceDir(workspace_id):
+    """
+    Returns the directory of a workspace, creating it if it has been pruned, and marks
+    it as used.
+
+    Each workspace has its own config, spot store and analysis tables, so concurrent
+    users don't overwrite each other's. Pass the directory as the directory argument
+    of getData, submitFetch, getSpotPage, exportSpots, analyseData and analyseQuery.
+    The spot cache and country index are shared by every workspace.
+
+    Raises:
+        ValueError: If workspace_id isn't one made by newWorkspace.
+    """
+    if not isinstance(workspace_id, str) or not WORKSPACE_ID.fullmatch(workspace_id):
+        raise ValueError(f"Invalid workspace: {workspace_id!r}")
+    directory = os.path.join(WORKSPACE_DIR, workspace_id)
+    os.makedirs(directory, exist_ok=True)
+    os.utime(directory)
+    return directory
+
+
+def pruneWorkspaces(max_age=WORKSPACE_EXPIRY):
+    """
+    Removes the workspaces that haven't been used for max_age.
+
+    Returns:
+        int: The number of workspaces removed.
+    """
+    if not os.path.isdir(WORKSPACE_DIR):
+        return 0
+
+    cutoff = time.time() - max_age.total_seconds()
+    removed = 0
+    for name in os.listdir(WORKSPACE_DIR):
+        directory = os.path.join(WORKSPACE_DIR, name)
+        if WORKSPACE_ID.fullmatch(name) and os.path.getmtime(directory) < cutoff:
+            shutil.rmtree(directory, ignore_errors=True)
+            _spots_changed(directory)
+            removed += 1
+
+    if removed:
+        logger.info(f"pruneWorkspaces: Removed {removed} workspaces unused for {max_age}")
+    return removed
+
+
+def spotStoreFormat():
+    """Returns the format the spot store is kept in, allowing for a missing pyarrow."""
+    if SPOT_STORE_FORMAT == FMT_PARQUET and not HAVE_PYARROW:
+        return FMT_CSV
+    return SPOT_STORE_FORMAT
+
+
+def _typed_spots(spots):
+    # Applies SPOT_DTYPES and parses the times of spots read as text
+    spots = spots.astype({column: dtype for column, dtype in SPOT_DTYPES.items() if column in spots.columns})
+    if SPOT_TIME_COLUMN in spots.columns:
+        spots[SPOT_TIME_COLUMN] = pd.to_datetime(spots[SPOT_TIME_COLUMN], format=TIME_FORMAT)
+    return _sorted_categories(spots)
+
+
+def _sorted_categories(spots):
+    # Puts the categories of every categorical column in sort order, so sorting,
+    # factorizing or grouping on their codes gives the same order as on the strings
+    for column in spots.columns:
+        values = spots[column]
+        if isinstance(values.dtype, pd.CategoricalDtype) and not values.cat.categories.is_monotonic_increasing:
+            spots[column] = values.cat.reorder_categories(values.cat.categories.sort_values())
+    return spots
+
+
+def storeSpots(csv_path, directory=DATA_DIR):
+    """
+    Converts a downloaded spot CSV into the canonical spot store.
+
+    In Parquet mode the spots are written with the explicit types in SPOT_DTYPES and
+    the CSV is removed; exportSpots recreates it on demand. In CSV mode, or if the
+    conversion fails, the CSV is kept as the store.
+
+    Returns:
+        str: Path of the spot store file.
+    """
+    parquet_path = os.path.join(directory, f"{DATAFILE_NAME}.{FMT_PARQUET}")
+
+    if spotStoreFormat() != FMT_PARQUET:
+        # Make sure readSpots doesn't pick up spots from an earlier Parquet store
+        if os.path.exists(parquet_path):
+            os.remove(parquet_path)
+        return csv_path
+
+    try:
+        spots = pd.read_csv(
+            csv_path,
+            dtype=SPOT_DTYPES,
+            parse_dates=[SPOT_TIME_COLUMN],
+            date_format=TIME_FORMAT
+        )
+        return storeSpotTable(spots, directory)
+    except Exception as e:
+        logger.warning(f"storeSpots: Keeping CSV store, could not write {parquet_path}: {e}")
+        if os.path.exists(parquet_path):
+            os.remove(parquet_path)
+        return csv_path
+
+
+def storeSpotTable(spots, directory=DATA_DIR):
+    """
+    Writes a typed spot DataFrame as the canonical spot store, replacing the spots
+    already stored.
+
+    Returns:
+        str: Path of the spot store file.
+    """
+    parquet_path = os.path.join(directory, f"{DATAFILE_NAME}.{FMT_PARQUET}")
+    csv_path = os.path.join(directory, f"{DATAFILE_NAME}.{FMT_CSV}")
+
+    if spotStoreFormat() == FMT_PARQUET:
+        part_path, store_path, stale_path = f"{parquet_path}.part", parquet_path, csv_path
+        spots.to_parquet(part_path, index=False)
+    else:
+        part_path, store_path, stale_path = f"{csv_path}.part", csv_path, parquet_path
+        spots.to_csv(part_path, index=False, date_format=TIME_FORMAT)
+    os.replace(part_path, store_path)
+    if os.path.exists(stale_path):
+        os.remove(stale_path)
+
+    logger.debug(f"storeSpotTable: {len(spots)} spots saved to {store_path}")
+    return store_path
+
+
+def spotStorePath(directory=DATA_DIR):
+    """Returns the path of the file readSpots reads the spots from."""
+    parquet_path = os.path.join(directory, f"{DATAFILE_NAME}.{FMT_PARQUET}")
+    if HAVE_PYARROW and os.path.exists(parquet_path):
+        return parquet_path
+    return os.path.join(directory, f"{DATAFILE_NAME}.{FMT_CSV}")
+
+
+def spotStoreFingerprint(directory=DATA_DIR):
+    """
+    Returns (path, mtime in ns, size) of the spot store, which changes whenever
+    getData writes new spots, or None if there is no store yet.
+    """
+    path = spotStorePath(directory)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return path, stat.st_mtime_ns, stat.st_size
+
+
+def readSpots(columns=None, directory=DATA_DIR):
+    """
+    Loads the stored spots into a DataFrame, typed as in SPOT_DTYPES with the time
+    column parsed.
+
+    Args:
+        columns (list, optional): Only read these columns. Defaults to all columns.
+        directory (str, optional): The directory holding the spot store.
+
+    Returns:
+        pd.DataFrame: The stored spots.
+    """
+    path = spotStorePath(directory)
+    logger.debug(f"readSpots: Reading {columns or 'all columns'} from {path}")
+
+    with measureStage("readSpots") as stage:
+        if path.endswith(f".{FMT_PARQUET}"):
+            spots = pd.read_parquet(path, columns=columns)
+        else:
+            spots = pd.read_csv(
+                path,
+                usecols=columns,
+                dtype=SPOT_DTYPES,
+                parse_dates=[SPOT_TIME_COLUMN] if columns is None or SPOT_TIME_COLUMN in columns else None,
+                date_format=TIME_FORMAT
+            )
+        stage["rows"] = len(spots)
+        stage["bytes"] = os.path.getsize(path)
+
+    return _sorted_categories(spots)
+
+
+def exportSpots(directory=DATA_DIR):
+    """
+    Returns the path of a CSV copy of the stored spots, writing it from the
+    Parquet store if there isn't one already, or None if no spots have been
+    fetched into directory yet.
+    """
+    csv_path = os.path.join(directory, f"{DATAFILE_NAME}.{FMT_CSV}")
+
+    if not os.path.exists(csv_path):
+        if spotStoreFingerprint(directory) is None:
+            logger.debug(f"exportSpots: No spot store in {directory}")
+            return None
+        spots = readSpots(directory=directory)
+        spots.to_csv(csv_path, index=False, date_format="%Y-%m-%d %H:%M:%S")
+        logger.debug(f"exportSpots: {len(spots)} spots exported to {csv_path}")
+
+    return csv_path
+
+
+def _plain_rows(spots, positions):
+    """
+    Returns the spots at these row positions as a list of dictionaries of plain
+    strings and numbers, with None for missing values, for Jinja and JSON alike.
+    """
+    # float32 columns are rounded to the digits they hold, so 51.5 doesn't show as 51.49999...
+    rows = spots.iloc[positions]
+    rows = rows.astype({column: "float64" for column in rows.columns if rows[column].dtype == np.float32})
+    rows = rows.round({column: 6 for column in rows.columns if rows[column].dtype == np.float64}).astype(object)
+    if pd.api.types.is_datetime64_any_dtype(spots.get(SPOT_TIME_COLUMN)):
+        rows[SPOT_TIME_COLUMN] = spots[SPOT_TIME_COLUMN].iloc[positions].dt.strftime(TIME_FORMAT).to_numpy()
+    rows = rows.where(rows.notna(), None)
+    return rows.to_dict(orient="records")
+
+
+class SpotTable:
+    """
+    The spots returned by getData, held by column with the types in SPOT_DTYPES.
+
+    Call signs and locators are categorical, so each spot costs a few dozen bytes
+    rather than a dictionary of strings. Iterating gives one dictionary per spot,
+    as getSpotPage's rows, converted SPOT_ROW_CHUNK spots at a time.
+    """
+
+    def __init__(self, spots):
+        self.spots = spots   # The typed DataFrame, for analysis
+
+    def __len__(self):
+        return len(self.spots)
+
+    def __iter__(self):
+        for start in range(0, len(self.spots), SPOT_ROW_CHUNK):
+            yield from _plain_rows(self.spots, np.arange(start, min(start + SPOT_ROW_CHUNK, len(self.spots))))
+
+    def __getitem__(self, position):
+        return _plain_rows(self.spots, [position])[0]
+
+    @property
+    def columns(self):
+        return self.spots.columns.tolist()
+
+    def memoryUsage(self):
+        """Returns the bytes held by the spots, categories included."""
+        return int(self.spots.memory_usage(index=False, deep=True).sum())
+
+
+# The stored spots and their sort orders, kept for paging and keyed by the spot store fingerprint
+_spot_table_cache = LRUCache(SPOT_TABLE_CACHE_SIZE)
+_spot_order_cache = LRUCache(SPOT_ORDER_CACHE_SIZE)
+
+
+def _spot_table(fingerprint, directory):
+    spots = _spot_table_cache.get(fingerprint)
+    if spots is None:
+        spots = readSpots(directory=directory)
+        _spot_table_cache.put(fingerprint, spots)
+    return spots
+
+
+def _spot_order(fingerprint, spots, sort, descending):
+    """Returns the row positions of the spots sorted by one column, missing values last."""
+    key = (fingerprint, sort, descending)
+    order = _spot_order_cache.get(key)
+    if order is None:
+        order = (
+            spots[sort]
+            .reset_index(drop=True)
+            .sort_values(ascending=not descending, kind="stable", na_position="last")
+            .index.to_numpy()
+        )
+        _spot_order_cache.put(key, order)
+    return order
+
+
+def _filter_mask(spots, filters):
+    """
+    Returns a boolean mask of the spots matching every filter. Text columns match
+    on a case-insensitive substring, numeric columns on an exact value.
+    """
+    mask = np.ones(len(spots), dtype=bool)
+    for column, value in filters.items():
+        if column not in spots.columns:
+            raise ValueError(f"Unknown column: {column}")
+        value = str(value).strip()
+        if not value:
+            continue
+        values = spots[column]
+        if pd.api.types.is_numeric_dtype(values):
+            try:
+                number = float(value)
+            except ValueError:
+                raise ValueError(f"{column} must be a number, not {value!r}")
+            mask &= (values == number).to_numpy()
+        elif pd.api.types.is_datetime64_any_dtype(values):
+            raise ValueError(f"Cannot filter on {column}")
+        else:
+            mask &= values.str.contains(value, case=False, regex=False, na=False).to_numpy()
+    return mask
+
+
+def getSpotPage(page=1, page_size=DATA_PAGE_SIZE, sort=None, descending=False, filters=None, directory=DATA_DIR):
+    """
+    Returns one page of the stored spots, sorted and filtered server-side.
+
+    The spots and each sort order are read once per spot store and cached, so the
+    cost of a page depends on the page size rather than on how many spots were fetched.
+
+    Args:
+        page (int, optional): Page number, starting at 1. Clamped to the last page.
+        page_size (int, optional): Spots per page, up to DATA_PAGE_SIZE_MAX.
+        sort (str, optional): Column to sort on. Defaults to the stored order.
+        descending (bool, optional): Sort largest first.
+        filters (dict, optional): {column: value} filters, see _filter_mask.
+        directory (str, optional): The directory holding the spot store.
+
+    Returns:
+        tuple: (page dict with columns, rows, page, pages, page_size, total and matched, error)
+    """
+    fingerprint = spotStoreFingerprint(directory)
+    if fingerprint is None:
+        return None, "No data has been fetched yet."
+
+    try:
+        page = max(int(page), 1)
+        page_size = min(max(int(page_size), 1), DATA_PAGE_SIZE_MAX)
+
+        spots = _spot_table(fingerprint, directory)
+        if sort and sort not in spots.columns:
+            raise ValueError(f"Unknown column: {sort}")
+
+        positions = _spot_order(fingerprint, spots, sort, descending) if sort else np.arange(len(spots))
+        if filters:
+            positions = positions[_filter_mask(spots, filters)[positions]]
+
+        matched = len(positions)
+        pages = max((matched + page_size - 1) // page_size, 1)
+        page = min(page, pages)
+        page_positions = positions[(page - 1) * page_size:page * page_size]
+
+        rows = _plain_rows(spots, page_positions)
+    except ValueError as e:
+        logger.debug(f"getSpotPage: {e}")
+        return None, str(e)
+
+    return {
+        "columns"    : spots.columns.tolist(),
+        "rows"       : rows,
+        "page"       : page,
+        "pages"      : pages,
+        "page_size"  : page_size,
+        "total"      : len(spots),
+        "matched"    : matched,
+        "sort"       : sort,
+        "descending" : descending
+    }, None
+
+@instrumented("getSummary")
+def getSummary(Data, directory=None):
 
     # Total number of spots using 'rx_sign'
     
@@ -233,18 +1628,19 @@ def getSummary(Data):
     ]
 
 
-    saveData(summary_list, SUMMARY_NAME, DATA_DIR, FMT_CSV)
+    saveData(summary_list, SUMMARY_NAME, directory or DATA_DIR, FMT_CSV)
 	
     return summary_list
 	
 
-def getDistantCallSigns(Data):
+@instrumented("getDistantCallSigns")
+def getDistantCallSigns(Data, directory=None):
 
     # Analyse and find the Call Signs furthest away.
     
     logger.debug("getDistantCallSigns")
     
-    furthest_idx = Data.groupby('rx_sign')['distance'].idxmax()
+    furthest_idx = Data.groupby('rx_sign', observed=True)['distance'].idxmax()
 
     furthest_spots = Data.loc[furthest_idx, ['rx_sign', 'rx_loc', 'distance']]
 
@@ -260,156 +1656,440 @@ def getDistantCallSigns(Data):
 
     logger.debug("getDistances: {furthest_stations}")
     
-    saveData(furthest_stations, DISTANCES_NAME, DATA_DIR, FMT_CSV)
+    saveData(furthest_stations, DISTANCES_NAME, directory or DATA_DIR, FMT_CSV)
     
     return furthest_stations
 
-def getCallSignCount(Data):
+def _group_firsts(group_codes):
+    # Positions where each run of a sorted code array starts
+    if not len(group_codes):
+        return np.array([], dtype=np.int64)
+    return np.flatnonzero(np.r_[True, group_codes[1:] != group_codes[:-1]])
+
+
+def _modal_codes(group_codes, value_codes, num_groups, num_values):
+    """
+    Returns the most frequent value code of each group, or -1 for groups with no values.
+
+    Ties go to the lowest value code, so with codes from a sorted factorize this matches
+    Series.mode().iloc[0]. Missing values (code -1) are ignored.
+    """
+    modal = np.full(num_groups, -1, dtype=np.int64)
+    valid = (group_codes >= 0) & (value_codes >= 0)
+    if not valid.any():
+        return modal
+
+    pairs, pair_counts = np.unique(group_codes[valid].astype(np.int64) * num_values + value_codes[valid],
+                                   return_counts=True)
+    pair_groups = pairs // num_values
+    pair_values = pairs % num_values
+
+    # Within each group put the highest count first, then the lowest value code
+    order = np.lexsort((pair_values, -pair_counts, pair_groups))
+    firsts = order[_group_firsts(pair_groups[order])]
+
+    modal[pair_groups[firsts]] = pair_values[firsts]
+    return modal
+
+
+@instrumented("getCallSignCount")
+def getCallSignCount(Data, directory=None):
 
     # Top Call Signs by frequency  - including Grid Reference
 
     logger.debug("getCallSignCount")
     
-    callSign_count= (
-        Data.groupby('rx_sign')
-        .agg(
-            Count=('rx_sign', 'size'),
-            gridRef=('rx_loc', lambda x: x.mode().iloc[0] if not x.mode().empty else '')
-        )
-        .reset_index()
-        .sort_values(by='Count', ascending=False)
-    )
+    # Count the spots of each receiver and find its most frequent grid from the
+    # (rx_sign, rx_loc) pair counts, rather than running Series.mode() per receiver.
+    # Ties go to the first grid in sort order, as mode().iloc[0] does.
+    rx_codes, rx_signs = pd.factorize(Data['rx_sign'], sort=True)
+    loc_codes, rx_locs = pd.factorize(Data['rx_loc'], sort=True)
+
+    modal_locs = _modal_codes(rx_codes, loc_codes, len(rx_signs), len(rx_locs))
+    grid_refs = np.array([rx_locs[code] if code >= 0 else '' for code in modal_locs], dtype=object)
+
+    callSign_count = pd.DataFrame({
+        'rx_sign': rx_signs,
+        'Count': np.bincount(rx_codes[rx_codes >= 0], minlength=len(rx_signs)),
+        'gridRef': grid_refs
+    }).sort_values(by='Count', ascending=False)
     
     logger.debug(f"getCallSigns: {callSign_count}")
     
-    saveData(callSign_count, CALLSIGNS_NAME, DATA_DIR, FMT_CSV)
+    saveData(callSign_count, CALLSIGNS_NAME, directory or DATA_DIR, FMT_CSV)
 
     return callSign_count
         
 
-def get_country_safely(callsign, callinfo_obj):
+# Decoded call signs, shared by every request in the process
+_callsign_cache = LRUCache(COUNTRY_CACHE_SIZE)
+_NOT_CACHED     = object()
+
+
+def decodeCallsign(callsign):
+    """
+    Returns the Callinfo.get_all() data for a call sign, or None if it cannot be decoded.
+
+    Results (including failures) are memoised in a process-wide LRU cache in front of
+    the shared country index, so popular receivers are only decoded once.
+    """
+    call_data = _callsign_cache.get(callsign, _NOT_CACHED)
+    if call_data is not _NOT_CACHED:
+        return call_data
+
+    try:
+        call_data = loadCountryIndex().get_all(callsign)
+    except KeyError: # Catch KeyError, as this is what get_all raises for undecodable callsigns
+        call_data = None
+
+    _callsign_cache.put(callsign, call_data)
+    return call_data
+
+
+def countryCacheStats():
+    """Returns the hit/miss/eviction counters of the call sign cache."""
+    return _callsign_cache.stats()
+
+
+def get_country_safely(callsign, callinfo_obj=None):
     if not callsign:
         return 'Unknown'
+    if callinfo_obj is None:
+        call_data = decodeCallsign(callsign)
+        return call_data.get('country', 'Unknown') if call_data else 'Unknown'
     try:
         call_data = callinfo_obj.get_all(callsign)
         return call_data.get('country', 'Unknown')
     except KeyError: # Catch KeyError, as this is what get_all raises for undecodable callsigns
         return 'Unknown'
         
-def getCountries(Data):
+# The country lookup is loaded once per process and shared by every request
+_country_callinfo = None
+_country_lock     = threading.Lock()
+
+
+def buildCountryIndex(cty_file=CTY_FILE, index_file=CTY_INDEX):
+    """
+    Parses the country file and pickles the resulting prefix/exception index.
+
+    The pickle records the mtime and size of the source plist, and the pyhamtools
+    version that built it, so a stale index is detected and rebuilt by loadCountryIndex.
+
+    Returns:
+        LookupLib: The freshly parsed lookup library.
+    """
+    logger.debug(f"buildCountryIndex: Parsing {cty_file}")
+
+    lookup = LookupLib(lookuptype="countryfile", filename=cty_file)
+    stat = os.stat(cty_file)
+
+    index = {
+        "source_mtime" : stat.st_mtime_ns,
+        "source_size"  : stat.st_size,
+        "pyhamtools"   : PYHAMTOOLS_VERSION,
+        "lookup"       : lookup
+    }
+
+    # Write to a temporary file first so a concurrent reader never sees a partial pickle
+    tmp_file = f"{index_file}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_file, "wb") as f:
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, index_file)
+        logger.debug(f"buildCountryIndex: Index saved to {index_file}")
+    except Exception as e:
+        logger.warning(f"buildCountryIndex: Could not save index to {index_file}: {e}")
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+    return lookup
+
+
+def _read_country_index(cty_file, index_file):
+    # Returns the pickled LookupLib if it is still valid for cty_file, otherwise None
+    if not os.path.exists(index_file):
+        return None
+    try:
+        with open(index_file, "rb") as f:
+            index = pickle.load(f)
+        stat = os.stat(cty_file)
+        if (index.get("source_mtime") != stat.st_mtime_ns
+                or index.get("source_size") != stat.st_size
+                or index.get("pyhamtools") != PYHAMTOOLS_VERSION):
+            logger.debug(f"Country index {index_file} is stale")
+            return None
+        return index["lookup"]
+    except Exception as e:
+        logger.warning(f"Country index {index_file} could not be read: {e}")
+        return None
+
+
+def loadCountryIndex(cty_file=CTY_FILE, index_file=CTY_INDEX):
+    """
+    Returns the process-wide Callinfo object, loading the country index on first use.
+
+    The compiled index under resources/ is used when it matches the current cty.plist;
+    otherwise the plist is parsed once and the index rebuilt. If there is no local
+    country file, pyhamtools downloads one and the result is kept in memory only.
+    """
+    global _country_callinfo
+
+    if _country_callinfo is not None:
+        return _country_callinfo
+
+    with _country_lock:
+        if _country_callinfo is None:
+            if os.path.exists(cty_file):
+                lookup = _read_country_index(cty_file, index_file)
+                if lookup is not None:
+                    logger.debug(f"Using compiled country index: {index_file}")
+                else:
+                    lookup = buildCountryIndex(cty_file, index_file)
+                    logger.debug(f"Using local country file: {cty_file}")
+            else:
+                logger.debug(f"Local country file not found at {cty_file}. Attempting to download.")
+                lookup = LookupLib(lookuptype="countryfile") # This will download from the internet
+                logger.debug("Downloaded country file from the internet.")
+
+            _country_callinfo = Callinfo(lookup)
+
+    return _country_callinfo
+
+
+def resolveCountries(callsigns, callinfo_obj=None):
+    """
+    Resolves a column of call signs to country names.
+
+    Each distinct call sign is decoded once (Callinfo walks the prefix table longest
+    prefix first) and the results are mapped back to the rows through the factorized
+    codes, so the cost scales with the number of receivers rather than spots.
+
+    Args:
+        callsigns: A Series or array of call signs.
+        callinfo_obj (Callinfo, optional): Lookup to use. Defaults to the shared country
+                                           index behind the call sign cache.
+
+    Returns:
+        pd.Categorical: The country of each call sign, 'Unknown' where it cannot be decoded.
+    """
+    codes, unique_calls = pd.factorize(np.asarray(callsigns, dtype=object))
+    codes, country_codes, country_names = _country_codes(codes, unique_calls, callinfo_obj)
+
+    logger.debug(f"resolveCountries: {len(codes)} call signs, {len(unique_calls)} distinct")
+
+    return pd.Categorical.from_codes(country_codes[codes], categories=country_names)
+
+
+def _country_codes(codes, unique_calls, callinfo_obj=None):
+    # Decodes each of unique_calls, returning the call sign codes (with missing call
+    # signs pointed at a trailing 'Unknown' entry), the country code of each distinct
+    # call sign and the country names, in order of first appearance
+    unique_countries = [get_country_safely(call, callinfo_obj) for call in unique_calls]
+
+    if (codes < 0).any():
+        unique_countries.append('Unknown')
+        codes = np.where(codes < 0, len(unique_calls), codes)
+
+    country_codes, country_names = pd.factorize(np.array(unique_countries, dtype=object))
+
+    return codes, country_codes, country_names
+
+@instrumented("getCountries")
+def getCountries(Data, directory=None):
     # Use Call Sign to get the Country, and then list the Countries and number of spots
     
     logger.debug(f"getCountries: City File: {CTY_FILE}")
 
-    # Check if the local file exists before trying to use it
-    if os.path.exists(CTY_FILE):
-        lookup = LookupLib(lookuptype="countryfile", filename=CTY_FILE)
-        logger.debug(f"Using local country file: {CTY_FILE}")
-    else:
-        logger.debug(f"Local country file not found at {CTY_FILE}. Attempting to download.")
-        lookup = LookupLib(lookuptype="countryfile") # This will download from the internet
-        logger.debug("Downloaded country file from the internet.")
-
-    callInfo = Callinfo(lookup)
-
+    # Country of each spot, decoding each distinct receiver once
+    countries = pd.Series(resolveCountries(Data['rx_sign']), name='country')
 
-    # Add country column
-    Data['country'] = Data['rx_sign'].apply(lambda call: get_country_safely(call, callInfo))
+    logger.debug(f"getCountries: Call sign cache: {countryCacheStats()}")
 
     # Create country spot count table
-    country_counts = Data['country'].value_counts().reset_index()
+    country_counts = countries.value_counts().reset_index()
     country_counts.columns = ['Country', 'Spots']
     country_counts = country_counts.sort_values(by='Spots', ascending=False)
 
-    saveData(country_counts, COUNTRIES_NAME, DATA_DIR, FMT_CSV)
+    saveData(country_counts, COUNTRIES_NAME, directory or DATA_DIR, FMT_CSV)
     return country_counts
 
-def frequencyBinning(Data, num_bins=8):
+def _quantile_edges(values, num_bins, counts=None):
+    # The num_bins + 1 bin edges pd.qcut cuts at, computed the way it does: evenly spaced
+    # probabilities, nudged up where they aren't exact in binary, through np.quantile.
+    # With counts, values[i] stands for counts[i] spots
+    if not len(values):
+        raise ValueError("No distances to bin")
+    quantiles = np.linspace(0, 1, num_bins + 1)
+    np.putmask(quantiles, num_bins * quantiles != np.arange(num_bins + 1), np.nextafter(quantiles, 1))
+    if counts is None:
+        return np.quantile(values, quantiles)
+
+    # np.quantile's linear interpolation between order statistics, looking each one up
+    # in the cumulative counts rather than in a sorted copy of every spot
+    order = np.argsort(values, kind="stable")
+    values = np.asarray(values)[order]
+    ends = np.cumsum(np.asarray(counts)[order])
+    total = int(ends[-1])
+    virtual = (total - 1) * quantiles
+    previous = np.clip(np.floor(virtual), 0, total - 1)
+    following = np.clip(previous + 1, 0, total - 1)
+    previous[virtual >= total - 1] = total - 1
+    gamma = virtual - previous
+    lower = values[np.searchsorted(ends, previous, side="right")]
+    upper = values[np.searchsorted(ends, following, side="right")]
+    difference = upper - lower
+    edges = lower + difference * gamma
+    np.subtract(upper, difference * (1 - gamma), out=edges, where=gamma >= 0.5)
+    return edges
+
+
+def _round_frac(x, precision):
+    # Rounds x to precision decimal places, or to precision significant digits if |x| < 1
+    if not np.isfinite(x) or x == 0:
+        return x
+    frac, whole = np.modf(x)
+    digits = -int(np.floor(np.log10(abs(frac)))) - 1 + precision if whole == 0 else precision
+    return np.around(x, digits)
+
+
+def _interval_breaks(edges, precision=3, include_lowest=True):
+    """
+    Returns the interval breaks pd.cut and pd.qcut label their bins with: the edges rounded
+    to the fewest decimal places (from precision) that keep them distinct. With
+    include_lowest (as qcut), the first break is lowered by one unit of the last place.
+    """
+    for digits in range(precision, 20):
+        breaks = [_round_frac(edge, digits) for edge in edges]
+        if len(np.unique(breaks)) == len(edges):
+            break
+    else:
+        digits = precision
+        breaks = [_round_frac(edge, digits) for edge in edges]
+    if include_lowest:
+        breaks[0] = breaks[0] - 10 ** (-digits)
+    return breaks
+
+
+def _frequency_table(distance, num_bins, counts=None):
+    # Distance binning into equal frequency bins, as pd.qcut would, but computing the
+    # edges once and counting the bins without adding columns. With counts, distance[i]
+    # stands for counts[i] spots
+    present = ~pd.isna(distance)
+    edges = _quantile_edges(distance[present], num_bins, None if counts is None else counts[present])
+    if len(np.unique(edges)) < len(edges) and len(edges) != 2:
+        raise ValueError(f"Bin edges must be unique: {edges!r}.")
+
+    breaks = _interval_breaks(edges)
+    bin_labels = [f"{int(lower)}-{int(upper)} km" for lower, upper in zip(breaks[:-1], breaks[1:])]
+    if len(set(bin_labels)) != len(bin_labels):
+        raise ValueError(f"Bin labels must be unique: {bin_labels}")
+
+    # Right-closed bins, with the lowest edge itself in the first bin
+    bin_ids = np.searchsorted(edges, distance, side="left")
+    bin_ids[distance == edges[0]] = 1
+    in_range = (bin_ids > 0) & (bin_ids < len(edges))
+
+    return pd.DataFrame({
+        "Distance Range": bin_labels,
+        "Number of Spots": _bin_counts(bin_ids[in_range] - 1, num_bins, None if counts is None else counts[in_range])
+    })
 
-    logger.debug("frequencyBinning")
-    
-    # Distance binning using pd.qcut for equal frequency bins
-    logger.debug(f"frequencyBinning: Number of Bins: {num_bins}")
 
-    Data['FrequencyBin'] = pd.qcut(Data['distance'], q=num_bins)
+def _bin_counts(bin_ids, num_bins, counts=None):
+    # Spots in each bin, where bin_ids[i] stands for counts[i] spots if given
+    if counts is None:
+        return np.bincount(bin_ids, minlength=num_bins)
+    return np.bincount(bin_ids, weights=counts, minlength=num_bins).astype(np.int64)
 
-    bin_labels = [f"{int(interval.left)}-{int(interval.right)} km" for interval in Data['FrequencyBin'].cat.categories]
 
-    Data['FrequencyBin'] = pd.qcut(Data['distance'], q=num_bins, labels=bin_labels)
+@instrumented("frequencyBinning")
+def frequencyBinning(Data, num_bins=8, directory=None):
 
-    distance_counts = Data['FrequencyBin'].value_counts().sort_index()
+    logger.debug("frequencyBinning")
+    logger.debug(f"frequencyBinning: Number of Bins: {num_bins}")
 
-    distance_table = pd.DataFrame({
-        "Distance Range": distance_counts.index,
-        "Number of Spots": distance_counts.values
-    })
+    distance_table = _frequency_table(Data['distance'].to_numpy(), num_bins)
     
     logger.debug(f"FrequencyBin: {distance_table}")
     
-    saveData(distance_table, BINNING_NAME, DATA_DIR, FMT_CSV)
+    saveData(distance_table, BINNING_NAME, directory or DATA_DIR, FMT_CSV)
     return distance_table
 
-def logarithmicBinning(Data, num_bins=8): # Can use qcut or cut on log-transformed data
+def _logarithmic_table(distance, num_bins, counts=None):
+    # Equal width bins of log(1 + distance), as pd.cut would with right=False, labelled
+    # in km. With counts, distance[i] stands for counts[i] spots
+    distance_log = np.log1p(np.asarray(distance, dtype=np.float64)) # log(1+x)
 
-    logger.debug("logarithmicBinning")
-    logger.debug(f"logarithmicBinning: Number of Bins: {num_bins}")
-
-    # Apply logarithmic transformation (using log1p to handle distance = 0 if any)
-    Data['distance_log'] = np.log1p(Data['distance']) # log(1+x)
-
-    # Now apply equal-width binning to the log-transformed data
-    # Use pd.cut to create bins of equal width in the log-space
-    # You can also use pd.qcut on the log-transformed data if you want equal frequency in log-space
-    log_min = Data['distance_log'].min()
-    log_max = Data['distance_log'].max()
+    if np.isnan(distance_log).all():
+        raise ValueError("No distances to bin")
+    log_min = np.nanmin(distance_log)
+    log_max = np.nanmax(distance_log)
     log_bins = np.linspace(log_min, log_max, num_bins + 1)
-    
-    Data['DistanceBin_Log'] = pd.cut(Data['distance_log'], bins=log_bins, right=False)
+    if len(np.unique(log_bins)) < len(log_bins) and len(log_bins) != 2:
+        raise ValueError(f"Bin edges must be unique: {log_bins!r}.")
 
     # Re-convert bin edges back to original km scale for labels
+    breaks = _interval_breaks(log_bins, include_lowest=False)
     bin_labels = []
-    for interval in Data['DistanceBin_Log'].cat.categories:
-        lower = np.expm1(interval.left) # exp(x)-1 to reverse log1p
-        upper = np.expm1(interval.right)
-        bin_labels.append(f"{int(lower)}-{int(upper)} km")
-    
-    Data['DistanceBin_Log'] = pd.cut(Data['distance_log'], bins=log_bins, right=False, labels=bin_labels)
-
-    distance_counts = Data['DistanceBin_Log'].value_counts().sort_index()
-    distance_table = pd.DataFrame({
-        "Distance Range": distance_counts.index,
-        "Number of Spots": distance_counts.values
+    for lower, upper in zip(breaks[:-1], breaks[1:]):
+        bin_labels.append(f"{int(np.expm1(lower))}-{int(np.expm1(upper))} km") # exp(x)-1 to reverse log1p
+    if len(set(bin_labels)) != len(bin_labels):
+        raise ValueError(f"Bin labels must be unique: {bin_labels}")
+
+    # Left-closed bins, so the longest distance falls outside the last bin, as with pd.cut
+    bin_ids = np.searchsorted(log_bins, distance_log, side="right")
+    in_range = (bin_ids > 0) & (bin_ids < len(log_bins))
+
+    return pd.DataFrame({
+        "Distance Range": bin_labels,
+        "Number of Spots": _bin_counts(bin_ids[in_range] - 1, num_bins, None if counts is None else counts[in_range])
     })
+
+
+@instrumented("logarithmicBinning")
+def logarithmicBinning(Data, num_bins=8, directory=None): # Can use qcut or cut on log-transformed data
+
+    logger.debug("logarithmicBinning")
+    logger.debug(f"logarithmicBinning: Number of Bins: {num_bins}")
+
+    distance_table = _logarithmic_table(Data['distance'].to_numpy(), num_bins)
     
     logger.debug(f"logarithmicBinning: {distance_table}")
     
-    saveData(distance_table, LOG_BINNING_NAME, DATA_DIR, FMT_CSV)
+    saveData(distance_table, LOG_BINNING_NAME, directory or DATA_DIR, FMT_CSV)
     
     return distance_table
 
 
-def getDistanceByHour(Data):
+@instrumented("getDistanceByHour")
+def getDistanceByHour(Data, directory=None):
 
     logger.debug("getDistanceByHour")
 
-    Data['Time'] = pd.to_datetime(Data['time'], format="%Y-%m-%d %H:%M:%S")
-
-    # Set 'Time' as the DataFrame's index for resampling
-    Data = Data.set_index('Time')
+    # Index the distances by time for resampling, leaving Data as it is
+    times = pd.DatetimeIndex(pd.to_datetime(Data['time'], format="%Y-%m-%d %H:%M:%S"))
+    distance = pd.Series(Data['distance'].to_numpy(), index=times, name='distance')
 
     # Define the date range for the data
-    start_date = Data.index.min().floor('D')
-    end_date = Data.index.max().ceil('D') - pd.Timedelta(seconds=1)
+    start_date = times.min().floor('D')
+    end_date = times.max().ceil('D') - pd.Timedelta(seconds=1)
 
     # Create a complete hourly time range for the period
     full_time_range = pd.date_range(start=start_date, end=end_date, freq='h')
 
     # Resample the data by hour, calculate mean, min, max, and count of 'distance'
-    daily_hourly_stats = Data['distance'].resample('h').agg(['mean', 'min', 'max', 'count'])
+    daily_hourly_stats = distance.resample('h').agg(['mean', 'min', 'max', 'count'])
 
     # Reindex the DataFrame to ensure all hours within the date range are present
     daily_hourly_stats = daily_hourly_stats.reindex(full_time_range)
 
+    return _hourly_records(daily_hourly_stats, directory or DATA_DIR)
+
+
+def _hourly_records(daily_hourly_stats, directory):
+    # Turns the mean, min, max and count of the distances in each hour into the hourly
+    # table, saves it to directory and returns it as a list of dicts
+
     # Rename the 'count' column for clarity (e.g., 'Spots')
     daily_hourly_stats = daily_hourly_stats.rename(columns={'count': 'Spots'})
 
@@ -441,7 +2121,7 @@ def getDistanceByHour(Data):
     # Log the type of daily_hourly_stats here
     logger.debug(f"Type of daily_hourly_stats before saving: {type(daily_hourly_stats)}")
     
-    saveData(daily_hourly_stats, HOURLY_NAME, DATA_DIR, FMT_CSV)
+    saveData(daily_hourly_stats, HOURLY_NAME, directory, FMT_CSV)
 
     # Convert DataFrame to a list of dictionaries for Jinja2 template rendering
     hourly_list_for_template = daily_hourly_stats.to_dict('records')
@@ -454,31 +2134,195 @@ def getDistanceByHour(Data):
     return hourly_list_for_template
 
 
-def analyseData(number_of_bins=8):
+@instrumented("analyseFused")
+def analyseFused(Data, number_of_bins=8, directory=None):
+    """
+    Computes every analysis table in as few passes over the spots as possible.
+
+    rx_sign and rx_loc are factorized once and the summary, furthest station, call sign
+    and country tables are all built from those codes, instead of each function running
+    its own groupby. The binning and hourly tables only read the distance and time columns.
+    No columns are added to Data. The tables, and the files saved, are identical to
+    running the individual functions one after another.
+
+    The tables are saved to directory, DATA_DIR if it is None.
+
+    Returns:
+        tuple: summaryData, freqBins, logBins, distanceData, callSignData, countryData, hourlyList
+    """
+    logger.debug("analyseFused")
+
+    directory = directory or DATA_DIR
+
+    distance = Data['distance'].to_numpy()
+
+    # Factorize the receivers in order of first appearance, then rank them so the
+    # sorted codes match the order groupby('rx_sign') would use
+    rx_first_codes, rx_first_signs = pd.factorize(Data['rx_sign'])
+    rx_order = np.argsort(np.asarray(rx_first_signs, dtype=object), kind="stable")
+    rx_rank = np.empty(len(rx_order), dtype=np.int64)
+    rx_rank[rx_order] = np.arange(len(rx_order))
+    rx_codes = np.where(rx_first_codes >= 0, rx_rank[rx_first_codes], -1)
+    rx_signs = rx_first_signs.take(rx_order)
+    num_rx = len(rx_signs)
+
+    loc_codes, rx_locs = pd.factorize(Data['rx_loc'], sort=True)
+
+    valid_rx = rx_codes >= 0
+    rx_counts = np.bincount(rx_codes[valid_rx], minlength=num_rx)
+
+    # Summary
+    grid_4_digit = {str(loc)[:4] for loc in rx_locs}
+    if (loc_codes < 0).any():
+        grid_4_digit.add(str(np.nan))   # Missing grids count as 'nan', as in getSummary
+
+    summaryData = [
+        {"label": "Total spots", "value": int(valid_rx.sum())},
+        {"label": "Total unique spots", "value": num_rx},
+        {"label": "Total unique grid squares (4 digits)", "value": len(grid_4_digit)},
+        {"label": "Total unique grid squares (6 digits)", "value": len(rx_locs)}
+    ]
+    saveData(summaryData, SUMMARY_NAME, directory, FMT_CSV)
+
+    # Furthest spot of each receiver: sort by receiver then distance (descending),
+    # keeping the original row order for ties, and take the first row of each receiver
+    order = np.lexsort((-distance, rx_codes))
+    order = order[valid_rx[order]]
+    furthest_rows = order[_group_firsts(rx_codes[order])]
+
+    distanceData = Data.iloc[furthest_rows][['rx_sign', 'rx_loc', 'distance']].reset_index(drop=True)
+    distanceData['Count'] = rx_counts
+    distanceData = distanceData.sort_values(by='distance', ascending=False)
+    saveData(distanceData, DISTANCES_NAME, directory, FMT_CSV)
+
+    # Spot count and most frequent grid of each receiver
+    modal_locs = _modal_codes(rx_codes, loc_codes, num_rx, len(rx_locs))
+    grid_refs = np.array([rx_locs[code] if code >= 0 else '' for code in modal_locs], dtype=object)
+
+    callSignData = pd.DataFrame({
+        'rx_sign': rx_signs,
+        'Count': rx_counts,
+        'gridRef': grid_refs
+    }).sort_values(by='Count', ascending=False)
+    saveData(callSignData, CALLSIGNS_NAME, directory, FMT_CSV)
+
+    # Countries: decode each receiver once and add up its spots
+    rx_first_codes, country_codes, country_names = _country_codes(rx_first_codes, rx_first_signs)
+    country_spots = np.bincount(country_codes[rx_first_codes], minlength=len(country_names))
+
+    country_counts = pd.Series(country_spots, index=pd.Index(country_names, name='country'))
+    country_counts = country_counts[country_counts > 0].sort_values(ascending=False, kind="stable")
+    countryData = country_counts.reset_index()
+    countryData.columns = ['Country', 'Spots']
+    countryData = countryData.sort_values(by='Spots', ascending=False)
+    saveData(countryData, COUNTRIES_NAME, directory, FMT_CSV)
+
+    logger.debug(f"analyseFused: {len(Data)} spots, {num_rx} receivers, {len(country_names)} countries")
+
+    # Distance and time tables read their own columns
+    freqBins   = frequencyBinning(Data, number_of_bins, directory)
+    logBins    = logarithmicBinning(Data, number_of_bins, directory)
+    hourlyList = getDistanceByHour(Data, directory)
+
+    return summaryData, freqBins, logBins, distanceData, callSignData, countryData, hourlyList
+
+
+# analyseData results, keyed by the spot store fingerprint and number of bins
+_analysis_cache = LRUCache(ANALYSIS_CACHE_SIZE)
+
+
+def analysisCacheStats():
+    """Returns the hit/miss/eviction counters of the analysis result cache."""
+    return _analysis_cache.stats()
+
+
+def _timed_stage(name, function, args):
+    """Runs one analysis function on args, returning its result and how long it took in seconds."""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def analyseStages(Data, number_of_bins=8, workers=1, directory=None):
+    """
+    Runs the individual analysis functions, one after another or on a pool of threads.
+
+    None of the functions modify Data, so with more than one worker they run concurrently
+    on the same frame. Most of their time is spent in NumPy and pandas, which release the
+    GIL, so the binning, groupby and hourly stages overlap with the country lookup. The
+    time each stage took is logged, along with the slowest stage (the critical path).
+
+    Args:
+        Data (pd.DataFrame): The spots, with at least ANALYSIS_COLUMNS.
+        number_of_bins (int): Number of bins for the binning functions.
+        workers (int): Threads to run the functions on; 1 runs them in turn.
+        directory (str, optional): Where the tables are saved. Defaults to DATA_DIR.
+
+    Returns:
+        tuple: summaryData, freqBins, logBins, distanceData, callSignData, countryData, hourlyList
+    """
+    logger.debug(f"analyseStages: {workers} worker(s)")
+
+    # In the order the tables are returned
+    stages = [
+        ("getSummary",          getSummary,          (Data, directory)),
+        ("frequencyBinning",    frequencyBinning,    (Data, number_of_bins, directory)),
+        ("logarithmicBinning",  logarithmicBinning,  (Data, number_of_bins, directory)),
+        ("getDistantCallSigns", getDistantCallSigns, (Data, directory)),
+        ("getCallSignCount",    getCallSignCount,    (Data, directory)),
+        ("getCountries",        getCountries,        (Data, directory)),
+        ("getDistanceByHour",   getDistanceByHour,   (Data, directory))
+    ]
+
+    start = time.perf_counter()
+    if workers > 1:
+        # The country lookup is the longest stage, so start it first
+        order = sorted(range(len(stages)), key=lambda i: stages[i][0] != "getCountries")
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis") as executor:
+            futures = {i: executor.submit(_timed_stage, *stages[i]) for i in order}
+            timed = [futures[i].result() for i in range(len(stages))]
+    else:
+        timed = [_timed_stage(*stage) for stage in stages]
+    elapsed = time.perf_counter() - start
+
+    for (name, _, _), (_, seconds) in zip(stages, timed):
+        logger.debug(f"analyseStages: {name} took {seconds:.3f}s")
+    slowest = max(range(len(stages)), key=lambda i: timed[i][1])
+    logger.debug(f"analyseStages: {elapsed:.3f}s in total, critical path {stages[slowest][0]} ({timed[slowest][1]:.3f}s)")
+
+    return tuple(result for result, _ in timed)
+
+
+@instrumented("analyseData")
+def analyseData(number_of_bins=8, directory=DATA_DIR):
 
     logger.debug("analyseData")
-    
-    try:
 
-        # Load the CSV file
-        logger.debug("analyseData: Loading CSV file")
-        
-        file_path = os.path.join(DATA_DIR, f"{DATAFILE_NAME}.{FMT_CSV}") 
+    # Reuse the tables if these spots have already been analysed with this many bins.
+    # The fingerprint is taken before the read, so a store replaced mid-analysis is
+    # recomputed on the next call rather than served stale.
+    cache_key = (spotStoreFingerprint(directory), number_of_bins)
+    if cache_key[0] is not None:
+        cached = _analysis_cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"analyseData: Using cached results for {cache_key}")
+            return cached
+
+    try:
 
-        logger.debug(f"analyseData: File Path: {file_path}")
+        # Load the spots, reading only the columns the analysis uses
+        logger.debug("analyseData: Loading spots")
 
-        df = pd.read_csv(file_path) 
+        df = readSpots(ANALYSIS_COLUMNS, directory)
 
         logger.debug("analyseData: File Read")
         logger.debug(f"DataFrame Columns: {df.columns.tolist()}")
 
-        summaryData   = getSummary(df)
-        freqBins      = frequencyBinning(df, number_of_bins)
-        logBins       = logarithmicBinning(df, number_of_bins)
-        distanceData  = getDistantCallSigns(df)
-        callSignData  = getCallSignCount(df)
-        countryData   = getCountries(df)
-        hourlyList    = getDistanceByHour(df)
+        if ANALYSIS_ENGINE == "fused":
+            summaryData, freqBins, logBins, distanceData, callSignData, countryData, hourlyList = analyseFused(df, number_of_bins, directory)
+        else:
+            workers = ANALYSIS_WORKERS if ANALYSIS_ENGINE == "parallel" else 1
+            summaryData, freqBins, logBins, distanceData, callSignData, countryData, hourlyList = analyseStages(df, number_of_bins, workers, directory)
         
         # Convert tables to lists of dicts for rendering in Jinja
         freqBinList     = freqBins.to_dict(orient="records")
@@ -501,13 +2345,198 @@ def analyseData(number_of_bins=8):
 
         logger.info("analyseData completed successfully.")
 
-        return summaryData, freqBinList, logBinList, callSignList, distanceList, countryList, hourlyList, None
+        results = summaryData, freqBinList, logBinList, callSignList, distanceList, countryList, hourlyList, None
+        if cache_key[0] is not None:
+            _analysis_cache.put(cache_key, results)
+
+        return results
     except Exception as e:
         logger.error(f"Error in analyseData: {e}")
         return None, None, None, None, None, None, None, f"Error in analyseData: {e}"
 
 
 
+# Aggregate queries for analyseQuery, run on wspr.live's wspr.rx table. {where} selects
+# the call sign's spots in the time window; empty locators are read back as missing.
+RECEIVER_QUERY = (
+    "SELECT rx_sign, rx_loc, count(*) AS spots, max(distance) AS max_distance "
+    "FROM wspr.rx WHERE {where} GROUP BY rx_sign, rx_loc ORDER BY rx_sign, rx_loc FORMAT CSVWithNames"
+)
+DISTANCE_QUERY = (
+    "SELECT distance, count(*) AS spots "
+    "FROM wspr.rx WHERE {where} GROUP BY distance ORDER BY distance FORMAT CSVWithNames"
+)
+HOURLY_QUERY = (
+    "SELECT toStartOfHour(time) AS hour, avg(distance) AS mean, min(distance) AS min_distance, "
+    "max(distance) AS max_distance, count(distance) AS spots "
+    "FROM wspr.rx WHERE {where} GROUP BY hour ORDER BY hour FORMAT CSVWithNames"
+)
+
+
+def querySpots(sql):
+    """
+    Runs a query on wspr.live's ClickHouse interface (WSPR_SQL_URL) and returns the
+    result, which must be in CSVWithNames format, as a DataFrame.
+
+    Raises:
+        requests.RequestException: The query failed.
+    """
+    logger.debug(f"querySpots: {sql}")
+
+    url = f"{WSPR_SQL_URL}/"
+    params = {"query": sql, "enable_http_compression": 1}
+    with measureStage("querySpots") as stage:
+        _rate_limiter(url).wait()
+        content = io.BytesIO()
+        with _http_session().get(url, params=params, stream=True, timeout=FETCH_TIMEOUT,
+                                 headers={"Accept-Encoding": FETCH_ENCODINGS}) as response:
+            response.raise_for_status()
+            for wire_size, chunk in _decoded_stream(response):
+                stage["wire_bytes"] = (stage["wire_bytes"] or 0) + wire_size
+                content.write(chunk)
+        stage["bytes"] = content.tell()
+        content.seek(0)
+        result = pd.read_csv(content)
+        stage["rows"] = len(result)
+
+    return result
+
+
+def useQuery(time_period_str):
+    """Returns True if a time period is long enough to be analysed by analyseQuery."""
+    try:
+        return QUERY_PERIOD is not None and parse_time_period(time_period_str) >= QUERY_PERIOD
+    except (ValueError, IndexError):
+        return False
+
+
+def _receiver_tables(receivers, directory):
+    # The summary, furthest station, call sign and country tables, from the spots and
+    # longest distance of each (rx_sign, rx_loc) pair. Receivers are listed in call sign
+    # order before each table is sorted, as the functions on the spots list them
+    spots_by_receiver = receivers.groupby('rx_sign', sort=True)['spots'].sum()
+
+    summary_list = [
+        {"label": "Total spots", "value": int(spots_by_receiver.sum())},
+        {"label": "Total unique spots", "value": len(spots_by_receiver)},
+        {"label": "Total unique grid squares (4 digits)", "value": receivers['rx_loc'].apply(lambda x: str(x)[:4]).nunique()},
+        {"label": "Total unique grid squares (6 digits)", "value": receivers['rx_loc'].nunique()}
+    ]
+    saveData(summary_list, SUMMARY_NAME, directory, FMT_CSV)
+
+    # Each receiver's furthest spot, taking the first grid in sort order on a tie
+    furthest = receivers.sort_values(['rx_sign', 'max_distance', 'rx_loc'], ascending=[True, False, True], kind="stable")
+    furthest = furthest.drop_duplicates('rx_sign').dropna(subset=['rx_sign'])
+    furthest_stations = pd.DataFrame({
+        'rx_sign': furthest['rx_sign'].to_numpy(),
+        'rx_loc': furthest['rx_loc'].to_numpy(),
+        'distance': furthest['max_distance'].to_numpy().astype(SPOT_DTYPES['distance']),
+        'Count': spots_by_receiver.reindex(furthest['rx_sign']).to_numpy()
+    }).sort_values(by='distance', ascending=False)
+    saveData(furthest_stations, DISTANCES_NAME, directory, FMT_CSV)
+
+    # Each receiver's most frequent grid, taking the first in sort order on a tie
+    located = receivers.dropna(subset=['rx_loc'])
+    modal = located.sort_values(['rx_sign', 'spots', 'rx_loc'], ascending=[True, False, True], kind="stable")
+    modal_locs = modal.drop_duplicates('rx_sign').set_index('rx_sign')['rx_loc']
+    callSign_count = pd.DataFrame({
+        'rx_sign': spots_by_receiver.index,
+        'Count': spots_by_receiver.to_numpy(),
+        'gridRef': modal_locs.reindex(spots_by_receiver.index).fillna('').to_numpy()
+    }).sort_values(by='Count', ascending=False)
+    saveData(callSign_count, CALLSIGNS_NAME, directory, FMT_CSV)
+
+    # Spots per country, decoding each receiver once; spots without a receiver are 'Unknown'
+    spots_by_call = receivers.groupby('rx_sign', sort=True, dropna=False)['spots'].sum()
+    countries = resolveCountries(spots_by_call.index)
+    country_counts = pd.Series(spots_by_call.to_numpy()).groupby(countries, observed=True, sort=False).sum()
+    country_counts = country_counts.sort_values(ascending=False, kind="stable").reset_index()
+    country_counts.columns = ['Country', 'Spots']
+    saveData(country_counts, COUNTRIES_NAME, directory, FMT_CSV)
+
+    return summary_list, furthest_stations, callSign_count, country_counts
+
+
+@instrumented("analyseQuery")
+def analyseQuery(call_sign, time_period_str, number_of_bins=8, directory=DATA_DIR):
+    """
+    Analyses a call sign's spots over a time period without downloading them.
+
+    Three aggregate queries run on wspr.live (WSPR_SQL_URL). They return the spots and
+    longest distance of each receiver and grid, the spots at each distance, and the
+    distance statistics of each hour, so only a few thousand rows come back however
+    long the period. The analysis tables are built from those results. They are the
+    tables analyseData builds from the downloaded spots, with two exceptions. Rows with
+    equal counts may be listed in a different order. A receiver heard from several grids
+    at its longest distance may be listed with a different one of them. The tables are
+    saved to directory.
+
+    Returns:
+        tuple: As analyseData.
+    """
+    logger.debug(f"analyseQuery: {call_sign}, {time_period_str}, {number_of_bins} bins")
+
+    try:
+        delta = parse_time_period(time_period_str)
+        end_time = datetime.utcnow().replace(microsecond=0)
+        end_time -= (end_time - EPOCH) % QUERY_SLOT
+        start_time = end_time - delta
+
+        cache_key = ("query", call_sign.upper(), start_time, end_time, number_of_bins, directory)
+        cached = _analysis_cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"analyseQuery: Using cached results for {cache_key}")
+            return cached
+
+        where = _spot_filter(call_sign, start_time, end_time)
+        with ThreadPoolExecutor(max_workers=3, thread_name_prefix="query") as executor:
+            receivers, distances, hours = executor.map(
+                querySpots,
+                [query.format(where=where) for query in (RECEIVER_QUERY, DISTANCE_QUERY, HOURLY_QUERY)]
+            )
+        logger.debug(f"analyseQuery: {len(receivers)} receiver grids, {len(distances)} distances, {len(hours)} hours")
+
+        if receivers.empty:
+            return None, None, None, None, None, None, None, "No data returned for this period and call sign."
+
+        summaryData, distanceData, callSignData, countryData = _receiver_tables(receivers, directory)
+
+        distances = distances.dropna(subset=['distance'])
+        distance = distances['distance'].to_numpy()
+        counts = distances['spots'].to_numpy()
+        freqBins = _frequency_table(distance, number_of_bins, counts)
+        saveData(freqBins, BINNING_NAME, directory, FMT_CSV)
+        logBins = _logarithmic_table(distance, number_of_bins, counts)
+        saveData(logBins, LOG_BINNING_NAME, directory, FMT_CSV)
+
+        hourly_stats = pd.DataFrame(
+            {'mean': hours['mean'].to_numpy(), 'min': hours['min_distance'].to_numpy(),
+             'max': hours['max_distance'].to_numpy(), 'count': hours['spots'].to_numpy()},
+            index=pd.DatetimeIndex(pd.to_datetime(hours['hour'], format=TIME_FORMAT).to_numpy())
+        )
+        hourlyList = _hourly_records(hourly_stats[hourly_stats['count'] > 0], directory)
+
+        logger.info("analyseQuery completed successfully.")
+
+        results = (
+            summaryData,
+            freqBins.to_dict(orient="records"),
+            logBins.to_dict(orient="records"),
+            callSignData.to_dict(orient="records"),
+            distanceData.to_dict(orient="records"),
+            countryData.to_dict(orient="records"),
+            hourlyList,
+            None
+        )
+        _analysis_cache.put(cache_key, results)
+
+        return results
+    except Exception as e:
+        logger.error(f"Error in analyseQuery: {e}")
+        return None, None, None, None, None, None, None, f"Error in analyseQuery: {e}"
+
+
+
 def visualiseData():
     try:
         png_path = "static/visualisation.png"
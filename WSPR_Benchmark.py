@@ -0,0 +1,447 @@
+#####################################################################
+##   Name:     WSPR_Benchmark.py                                   ##
+#####################################################################
+##   Summary:                                                      ##
+##                                                                 ##
+##   Offline benchmarks for the WSPR Analytics analysis functions, ##
+##   run against synthetic spots so no wspr.live access is needed. ##
+##                                                                 ##
+##   Usage:  python WSPR_Benchmark.py analysis                     ##
+##           python WSPR_Benchmark.py callsigns                    ##
+##           python WSPR_Benchmark.py load  (see WSPR_Standin.py)  ##
+##           python WSPR_Benchmark.py startup                      ##
+##                                                                 ##
+#####################################################################
+
+# -*- coding: utf-8 -*-
+
+## Imports ##
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import platform
+import tracemalloc
+import threading
+import subprocess
+import multiprocessing
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qs
+import numpy as np
+import pandas as pd
+import requests
+
+import WSPR_Analytics
+from WSPR_Synthetic import syntheticSpots
+
+try:
+    import resource  # Peak RSS is only available on Unix
+except ImportError:
+    resource = None
+
+## Constants ##
+
+DEFAULT_SIZES  = [10_000, 100_000, 1_000_000]
+REPEATS        = 3
+DEFAULT_OUTPUT = "WSPR_Benchmark.json"
+
+DEFAULT_APP_URL   = "http://127.0.0.1:5000"
+DEFAULT_ROUTES    = ["/data", "/analysis"]
+JOB_POLL_INTERVAL = 0.1   # Seconds between polls of a /data fetch job
+
+STARTUP_ROUTES = ["/", "/logs"]   # Routes requested first after a cold start
+
+# Run in a fresh interpreter for each startup measurement: times the import of app.py,
+# create_app() and the first request to each route, then waits for the analysis engine
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+web = app.create_app(preload=sys.argv[1] == "1")
+created = time.perf_counter()
+client = web.test_client()
+timings = [["import app", imported - start], ["create_app", created - imported]]
+for route in sys.argv[2:]:
+    before = time.perf_counter()
+    status = client.get(route).status_code
+    timings.append(["GET " + route, time.perf_counter() - before])
+    if status != 200:
+        sys.exit("GET %s: HTTP %d" % (route, status))
+import WSPR_Analytics
+timings.append(["engine ready", time.perf_counter() - start])
+print(json.dumps(timings))
+"""
+ENGINE_IMPORT_SCRIPT = "import time; start = time.perf_counter(); import WSPR_Analytics; print(time.perf_counter() - start)"
+
+## Main Code ##
+
+
+def _callsign_count_mode(Data):
+    # The original getCallSignCount, which runs Series.mode() once per receiver
+    return (
+        Data.groupby('rx_sign')
+        .agg(
+            Count=('rx_sign', 'size'),
+            gridRef=('rx_loc', lambda x: x.mode().iloc[0] if not x.mode().empty else '')
+        )
+        .reset_index()
+        .sort_values(by='Count', ascending=False)
+    )
+
+
+def _best_time(func, *args):
+    # Best wall time of REPEATS runs, and the last result
+    best = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def benchmarkCallSignCount(sizes=DEFAULT_SIZES):
+    """
+    Compares the per-receiver mode lambda with the vectorized getCallSignCount.
+    """
+    print(f"{'Spots':>10} {'Receivers':>10} {'mode() (s)':>12} {'vectorized (s)':>15} {'Speedup':>8}")
+    for num_spots in sizes:
+        spots = syntheticSpots(num_spots)[WSPR_Analytics.ANALYSIS_COLUMNS]
+
+        old_time, old_result = _best_time(_callsign_count_mode, spots)
+        new_time, new_result = _best_time(WSPR_Analytics.getCallSignCount, spots)
+
+        if old_result.to_dict("records") != new_result.to_dict("records"):
+            raise AssertionError(f"getCallSignCount differs from the mode() version at {num_spots} spots")
+
+        print(f"{num_spots:>10,} {spots['rx_sign'].nunique():>10,} {old_time:>12.3f} {new_time:>15.3f} {old_time / new_time:>7.1f}x")
+
+
+# The analysis functions, called the way analyseData calls them
+ANALYSIS_FUNCTIONS = {
+    "getSummary"          : lambda spots, bins: WSPR_Analytics.getSummary(spots),
+    "frequencyBinning"    : lambda spots, bins: WSPR_Analytics.frequencyBinning(spots, bins),
+    "logarithmicBinning"  : lambda spots, bins: WSPR_Analytics.logarithmicBinning(spots, bins),
+    "getDistantCallSigns" : lambda spots, bins: WSPR_Analytics.getDistantCallSigns(spots),
+    "getCallSignCount"    : lambda spots, bins: WSPR_Analytics.getCallSignCount(spots),
+    "getCountries"        : lambda spots, bins: WSPR_Analytics.getCountries(spots),
+    "getDistanceByHour"   : lambda spots, bins: WSPR_Analytics.getDistanceByHour(spots),
+    "analyseFused"        : lambda spots, bins: WSPR_Analytics.analyseFused(spots, bins),
+    "analyseStages"       : lambda spots, bins: WSPR_Analytics.analyseStages(spots, bins, WSPR_Analytics.ANALYSIS_WORKERS)
+}
+
+
+def _rss_bytes():
+    # Current resident set size, or None where /proc isn't available
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _measure(name, spots, num_bins, repeats):
+    """
+    Measures one analysis function: best wall time of `repeats` runs, then one run
+    under tracemalloc for the allocations, and the process peak RSS.
+
+    Each run gets a cold call sign cache, which isn't counted in the timings. The
+    functions don't modify the spots, so every run shares the same frame.
+    """
+    func = ANALYSIS_FUNCTIONS[name]
+    rss_before = _rss_bytes()
+
+    best = None
+    for _ in range(repeats):
+        WSPR_Analytics._callsign_cache.clear()
+        start = time.perf_counter()
+        func(spots, num_bins)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    WSPR_Analytics._callsign_cache.clear()
+    tracemalloc.start()
+    func(spots, num_bins)
+    snapshot = tracemalloc.take_snapshot()
+    _, alloc_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    peak_rss = None
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+    return {
+        "function"          : name,
+        "wall_time_s"       : round(best, 6),
+        "alloc_peak_bytes"  : alloc_peak,
+        "alloc_live_bytes"  : sum(stat.size for stat in snapshot.statistics("filename")),
+        "alloc_live_blocks" : sum(stat.count for stat in snapshot.statistics("filename")),
+        "peak_rss_bytes"    : peak_rss,
+        "rss_growth_bytes"  : peak_rss - rss_before if peak_rss is not None and rss_before is not None else None
+    }
+
+
+def _measure_child(connection, name, spots, num_bins, repeats):
+    try:
+        connection.send(_measure(name, spots, num_bins, repeats))
+    except Exception as e:
+        connection.send({"function": name, "error": str(e)})
+    finally:
+        connection.close()
+
+
+def benchmarkAnalysis(sizes=DEFAULT_SIZES, functions=None, num_bins=8, repeats=REPEATS, seed=1):
+    """
+    Runs each analysis function against synthetic spots of each size.
+
+    Where fork is available each function runs in its own child process, so the
+    peak RSS belongs to that function alone rather than to everything before it.
+
+    Returns:
+        list: One result dictionary per function and size.
+    """
+    functions = functions or list(ANALYSIS_FUNCTIONS)
+    use_fork = "fork" in multiprocessing.get_all_start_methods()
+
+    # Load the country index up front so it isn't counted against getCountries
+    WSPR_Analytics.loadCountryIndex()
+
+    results = []
+    print(f"{'Function':<20} {'Spots':>10} {'Time (s)':>10} {'Alloc peak (MB)':>16} {'Peak RSS (MB)':>14}")
+    for num_spots in sizes:
+        spots = syntheticSpots(num_spots, seed=seed)[WSPR_Analytics.ANALYSIS_COLUMNS]
+
+        for name in functions:
+            if use_fork:
+                context = multiprocessing.get_context("fork")
+                parent, child = context.Pipe(duplex=False)
+                process = context.Process(target=_measure_child, args=(child, name, spots, num_bins, repeats))
+                process.start()
+                child.close()
+                result = parent.recv()
+                process.join()
+            else:
+                result = _measure(name, spots, num_bins, repeats)
+
+            result.update({"spots": num_spots, "receivers": int(spots["rx_sign"].nunique()), "bins": num_bins})
+            results.append(result)
+
+            if "error" in result:
+                print(f"{name:<20} {num_spots:>10,} error: {result['error']}")
+                continue
+
+            rss = f"{result['peak_rss_bytes'] / 2**20:>14.1f}" if result["peak_rss_bytes"] else f"{'-':>14}"
+            print(f"{name:<20} {num_spots:>10,} {result['wall_time_s']:>10.3f} {result['alloc_peak_bytes'] / 2**20:>16.1f} {rss}")
+
+    return results
+
+
+def compareResults(results, baseline_file, tolerance):
+    """
+    Compares wall times with an earlier results file.
+
+    Returns:
+        list: Descriptions of the functions that got slower than baseline * tolerance.
+    """
+    with open(baseline_file, "r", encoding="utf-8") as f:
+        baseline = {(r["function"], r.get("spots")): r for r in json.load(f)["results"] if "wall_time_s" in r}
+
+    regressions = []
+    for result in results:
+        before = baseline.get((result["function"], result.get("spots")))
+        if before and "wall_time_s" in result and result["wall_time_s"] > before["wall_time_s"] * tolerance:
+            where = f" at {result['spots']:,} spots" if result.get("spots") is not None else ""
+            regressions.append(f"{result['function']}{where}: "
+                               f"{before['wall_time_s']:.3f}s -> {result['wall_time_s']:.3f}s")
+    return regressions
+
+
+def _virtual_user(app_url, routes, num_requests, config, timings, errors):
+    # One user: save a configuration, then request the routes in turn
+    session = requests.Session()
+    session.post(f"{app_url}/", data=dict(config, submit="Submit"), allow_redirects=False).raise_for_status()
+
+    for i in range(num_requests):
+        route = routes[i % len(routes)]
+        start = time.perf_counter()
+        try:
+            response = session.get(f"{app_url}{route}")
+            # /data hands the fetch to a background job; wait for it and the page of spots
+            job_id = parse_qs(urlsplit(response.url).query).get("job", [None])[0]
+            if job_id:
+                while session.get(f"{app_url}/jobs/{job_id}").json().get("status") in ("queued", "running"):
+                    time.sleep(JOB_POLL_INTERVAL)
+                response = session.get(response.url)
+            elapsed = time.perf_counter() - start
+            if response.status_code != 200:
+                errors.append((route, f"HTTP {response.status_code}"))
+            timings.append((route, elapsed))
+        except requests.RequestException as e:
+            errors.append((route, str(e)))
+
+
+def loadTest(app_url=DEFAULT_APP_URL, users=4, num_requests=20, routes=DEFAULT_ROUTES,
+             call_sign="2E0IJC", period="1 day", num_bins=8):
+    """
+    Drives a running WSPR Analytics app with concurrent users and reports the
+    throughput and latency percentiles of each route.
+
+    Start the app against the stand-in server first, for both downloads and
+    queries, e.g.
+    python WSPR_Standin.py & WSPR_URL=http://127.0.0.1:8080 WSPR_SQL_URL=http://127.0.0.1:8080 python app.py
+    """
+    config = {"CallSign": call_sign, "Period": period, "TopStations": "10", "NumBins": str(num_bins)}
+    timings, errors = [], []
+
+    threads = [threading.Thread(target=_virtual_user, args=(app_url, routes, num_requests, config, timings, errors))
+               for _ in range(users)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    results = []
+    print(f"{'Route':<12} {'Requests':>9} {'Errors':>7} {'Req/s':>8} {'p50 (s)':>8} {'p90 (s)':>8} {'p99 (s)':>8} {'Max (s)':>8}")
+    for route in routes:
+        latencies = np.array([t for r, t in timings if r == route])
+        if not len(latencies):
+            continue
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+        result = {
+            "route"         : route,
+            "requests"      : len(latencies),
+            "errors"        : sum(1 for r, _ in errors if r == route),
+            "throughput_rps": round(len(latencies) / elapsed, 3),
+            "p50_s"         : round(p50, 4),
+            "p90_s"         : round(p90, 4),
+            "p99_s"         : round(p99, 4),
+            "max_s"         : round(latencies.max(), 4)
+        }
+        results.append(result)
+        print(f"{route:<12} {result['requests']:>9} {result['errors']:>7} {result['throughput_rps']:>8.2f} "
+              f"{p50:>8.3f} {p90:>8.3f} {p99:>8.3f} {result['max_s']:>8.3f}")
+
+    print(f"{users} users, {len(timings)} requests in {elapsed:.1f}s: {len(timings) / elapsed:.2f} req/s")
+    for route, error in errors[:10]:
+        print(f"Error on {route}: {error}")
+
+    return results
+
+
+def _run_fresh(script, args=()):
+    # Runs a script in a new interpreter beside app.py and returns its last line of output
+    directory = os.path.dirname(os.path.abspath(__file__))
+    completed = subprocess.run([sys.executable, "-c", script, *args], cwd=directory, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else f"Exit code {completed.returncode}")
+    return completed.stdout.strip().splitlines()[-1]
+
+
+def benchmarkStartup(routes=STARTUP_ROUTES, repeats=REPEATS, preload=True):
+    """
+    Measures a cold start of the web app: importing app.py, create_app(), the first
+    request to each route, and the time until the analysis engine is loaded ("engine
+    ready", from the start). On its own, importing WSPR_Analytics is timed as well.
+
+    Every run starts a fresh interpreter, so nothing is already imported. Each step's
+    median over the runs is reported.
+
+    Returns:
+        list: One result dictionary per step.
+    """
+    runs = {}
+    for _ in range(repeats):
+        runs.setdefault("import WSPR_Analytics", []).append(float(_run_fresh(ENGINE_IMPORT_SCRIPT)))
+        for step, seconds in json.loads(_run_fresh(STARTUP_SCRIPT, ["1" if preload else "0", *routes])):
+            runs.setdefault(step, []).append(seconds)
+
+    results = []
+    print(f"{'Step':<24} {'Median (s)':>11} {'Min (s)':>9} {'Max (s)':>9}")
+    for step, times in runs.items():
+        result = {
+            "function"    : step,
+            "wall_time_s" : round(float(np.median(times)), 6),
+            "min_s"       : round(min(times), 6),
+            "max_s"       : round(max(times), 6),
+            "runs"        : len(times),
+            "preload"     : preload
+        }
+        results.append(result)
+        print(f"{step:<24} {result['wall_time_s']:>11.3f} {result['min_s']:>9.3f} {result['max_s']:>9.3f}")
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the WSPR Analytics analysis functions.")
+    parser.add_argument("benchmark", choices=["analysis", "callsigns", "load", "startup"], help="Benchmark to run")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Numbers of spots to test")
+    parser.add_argument("--functions", nargs="+", choices=list(ANALYSIS_FUNCTIONS), help="Analysis functions to run (default all)")
+    parser.add_argument("--bins", type=int, default=8, help="Number of distance bins")
+    parser.add_argument("--repeats", type=int, default=REPEATS, help="Timed runs per function; the best is reported")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the synthetic spots")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSON results file")
+    parser.add_argument("--compare", help="Earlier JSON results to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="Allowed slow-down against --compare")
+    parser.add_argument("--url", default=DEFAULT_APP_URL, help="load: URL of the running app")
+    parser.add_argument("--users", type=int, default=4, help="load: Concurrent users")
+    parser.add_argument("--requests", type=int, default=20, help="load: Requests per user")
+    parser.add_argument("--routes", nargs="+", help=f"load: Routes each user requests in turn (default {' '.join(DEFAULT_ROUTES)}); "
+                                                    f"startup: Routes requested first (default {' '.join(STARTUP_ROUTES)})")
+    parser.add_argument("--no-preload", action="store_true", help="startup: Don't load the analysis engine in the background")
+    parser.add_argument("--call-sign", default="2E0IJC", help="load: Call sign to configure")
+    parser.add_argument("--period", default="1 day", help="load: Period to configure")
+    args = parser.parse_args(argv)
+
+    # Keep the benchmark's debug logging out of the way
+    logging.getLogger().setLevel(logging.WARNING)
+
+    if args.benchmark == "load":
+        results = loadTest(args.url, args.users, args.requests, args.routes or DEFAULT_ROUTES, args.call_sign, args.period, args.bins)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"created": datetime.now().isoformat(timespec="seconds"), "url": args.url,
+                       "users": args.users, "results": results}, f, indent=4)
+        print(f"Results written to {args.output}")
+        return 0
+
+    if args.benchmark == "startup":
+        results = benchmarkStartup(args.routes or STARTUP_ROUTES, args.repeats, not args.no_preload)
+    else:
+        # Keep the benchmark's table files out of the way
+        WSPR_Analytics.DATA_DIR = tempfile.mkdtemp(prefix="wspr_bench_")
+
+        if args.benchmark == "callsigns":
+            benchmarkCallSignCount(args.sizes)
+            return 0
+
+        results = benchmarkAnalysis(args.sizes, args.functions, args.bins, args.repeats, args.seed)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({
+            "created"  : datetime.now().isoformat(timespec="seconds"),
+            "python"   : platform.python_version(),
+            "pandas"   : pd.__version__,
+            "numpy"    : np.__version__,
+            "platform" : platform.platform(),
+            "results"  : results
+        }, f, indent=4)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        regressions = compareResults(results, args.compare, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
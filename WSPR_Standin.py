@@ -0,0 +1,296 @@
+#####################################################################
+##   Name:     WSPR_Standin.py                                     ##
+#####################################################################
+##   Summary:                                                      ##
+##                                                                 ##
+##   A local stand-in for wspr.live's downloader, serving          ##
+##   synthetic spots in the same CSV schema, for offline load      ##
+##   testing. Point WSPR Analytics at it with WSPR_URL and         ##
+##   WSPR_SQL_URL, as downloads go through the query interface:    ##
+##                                                                 ##
+##     python WSPR_Standin.py --port 8080                          ##
+##     WSPR_URL=http://127.0.0.1:8080 \                            ##
+##     WSPR_SQL_URL=http://127.0.0.1:8080 python app.py            ##
+##                                                                 ##
+##   It also answers the aggregate queries of analyseQuery, run    ##
+##   with SQLite in place of wspr.live's ClickHouse interface.     ##
+##                                                                 ##
+#####################################################################
+
+# -*- coding: utf-8 -*-
+
+## Imports ##
+import sys
+import re
+import csv
+import io
+import time
+import zlib
+import sqlite3
+import logging
+import argparse
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import numpy as np
+import pandas as pd
+
+import WSPR_Synthetic
+
+try:
+    import zstandard
+    HAVE_ZSTD = True
+except ImportError:
+    HAVE_ZSTD = False
+
+## Constants ##
+
+DEFAULT_PORT      = 8080
+DEFAULT_RECEIVERS = 2000
+SPOTS_PER_SLOT    = 20          # Average spots per 2 minute slot (before the day/night cycle)
+CHUNK_SIZE        = 64 * 1024   # Bytes per chunk of the response
+TIME_FORMAT       = "%Y-%m-%d %H:%M:%S"
+EPOCH             = datetime(1970, 1, 1)
+
+# The parts of a query the spots are generated from, and its output format
+SQL_TX_SIGN = re.compile(r"\btx_sign\s*=\s*'([^']*)'", re.IGNORECASE)
+SQL_START   = re.compile(r"\btime\s*>=\s*'([^']*)'", re.IGNORECASE)
+SQL_END     = re.compile(r"\btime\s*<=\s*'([^']*)'", re.IGNORECASE)
+SQL_FORMAT  = re.compile(r"\s+FORMAT\s+(\w+)\s*;?\s*$", re.IGNORECASE)
+
+## Main Code ##
+
+logger = logging.getLogger("WSPR_Standin")
+
+
+class StandinSpots:
+    """
+    Generates the spots for any call sign and time range.
+
+    Each 2 minute slot is generated from its own seed, so the same slot always has the
+    same spots and ids however the time range is split up between requests, just as
+    repeated queries to wspr.live return the same rows.
+    """
+
+    def __init__(self, num_receivers=DEFAULT_RECEIVERS, spots_per_slot=SPOTS_PER_SLOT, seed=1):
+        self.receivers = WSPR_Synthetic.syntheticReceivers(num_receivers, seed)
+        self.spots_per_slot = spots_per_slot
+        self.seed = seed
+
+    def spots(self, tx_sign, start_time, end_time):
+        """Returns the spots of tx_sign with start_time <= time <= end_time as a DataFrame."""
+        # The times are naive UTC, as in the query; timestamp() would take them as local time
+        first_slot = int(np.ceil((start_time - EPOCH).total_seconds() / 120))
+        last_slot = int(np.floor((end_time - EPOCH).total_seconds() / 120))
+        call_seed = zlib.crc32(tx_sign.upper().encode("utf-8"))
+
+        slots = np.arange(first_slot, last_slot + 1, dtype=np.int64)
+        activity = WSPR_Synthetic.slotActivity(pd.to_datetime(slots * 120, unit="s"))
+
+        positions, times, ids = [], [], []
+        for slot, slot_activity in zip(slots, activity):
+            rng = np.random.default_rng((self.seed, call_seed, int(slot)))
+            count = rng.poisson(self.spots_per_slot * slot_activity / 1.5)
+            positions.append(WSPR_Synthetic.pickReceivers(self.receivers, count, rng))
+            times.append(np.full(count, slot * 120, dtype=np.int64))
+            ids.append(slot * 1000 + np.arange(count, dtype=np.int64))
+
+        rng = np.random.default_rng((self.seed, call_seed, first_slot, last_slot))
+        return WSPR_Synthetic.spotTable(
+            self.receivers,
+            np.concatenate(positions) if positions else np.array([], dtype=np.int64),
+            pd.to_datetime(np.concatenate(times) if times else np.array([], dtype=np.int64), unit="s"),
+            np.concatenate(ids) if ids else np.array([], dtype=np.int64),
+            rng,
+            tx_sign
+        )
+
+    def database(self, tx_sign, start_time, end_time):
+        """
+        Returns an in-memory SQLite database holding the spots as the table wspr.rx, with
+        ClickHouse's toStartOfHour() defined, so wspr.live style queries run unchanged.
+        """
+        connection = sqlite3.connect(":memory:")
+        connection.execute("ATTACH DATABASE ':memory:' AS wspr")
+        connection.create_function("toStartOfHour", 1, lambda time: time and time[:13] + ":00:00", deterministic=True)
+        # pandas only writes to the main schema of a plain sqlite3 connection
+        self.spots(tx_sign, start_time, end_time).to_sql("rx", connection, index=False)
+        connection.execute("CREATE TABLE wspr.rx AS SELECT * FROM main.rx")
+        connection.execute("DROP TABLE main.rx")
+        return connection
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """
+    Serves GET /wspr_downloader.php?start=...&end=...&tx_sign=...&format=CSV
+    as a chunked CSV response, and GET /?query=... as wspr.live's ClickHouse
+    interface does for queries on wspr.rx in CSVWithNames format.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    # Set by main()
+    spot_source = None
+    latency     = 0.0
+    chunk_size  = CHUNK_SIZE
+    chunk_delay = 0.0
+    compression = True
+
+    def content_encoding(self):
+        # The compression to use from the request's Accept-Encoding: zstd if both ends
+        # have it, then gzip, otherwise none
+        if not self.compression:
+            return None
+        accepted = {part.split(";")[0].strip().lower() for part in self.headers.get("Accept-Encoding", "").split(",")}
+        if HAVE_ZSTD and "zstd" in accepted:
+            return "zstd"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    @staticmethod
+    def compressor(encoding):
+        # A streaming compressor with compress() and flush(), or None
+        if encoding == "zstd":
+            return zstandard.ZstdCompressor().compressobj()
+        if encoding == "gzip":
+            return zlib.compressobj(wbits=31)
+        return None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/" and "query" in query:
+            # As ClickHouse, only compress query results when asked to
+            self.run_query(query["query"][0], query.get("enable_http_compression", ["0"])[0] == "1")
+            return
+        if url.path != "/wspr_downloader.php":
+            self.send_error(404)
+            return
+
+        try:
+            start_time = datetime.strptime(query["start"][0], TIME_FORMAT)
+            end_time = datetime.strptime(query["end"][0], TIME_FORMAT)
+            tx_sign = query["tx_sign"][0]
+        except (KeyError, ValueError) as e:
+            self.send_error(400, f"Bad query: {e}")
+            return
+
+        # Time to first byte
+        if self.latency:
+            time.sleep(self.latency)
+
+        body = self.spot_source.spots(tx_sign, start_time, end_time).to_csv(index=False).encode("utf-8")
+
+        encoding = self.content_encoding()
+        compressor = self.compressor(encoding)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv; charset=utf-8")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        sent = 0
+        for offset in range(0, len(body) + 1, self.chunk_size):
+            chunk = body[offset:offset + self.chunk_size]
+            if compressor:
+                chunk = compressor.compress(chunk)
+                if offset + self.chunk_size > len(body):
+                    chunk += compressor.flush()
+            if chunk:
+                self.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+                sent += len(chunk)
+            if self.chunk_delay:
+                self.wfile.flush()
+                time.sleep(self.chunk_delay)
+        self.wfile.write(b"0\r\n\r\n")
+
+        logger.info(f"{tx_sign} {start_time} - {end_time}: {len(body)} bytes, {sent} sent ({encoding or 'identity'})")
+
+    def run_query(self, sql, compress=False):
+        # The spots are generated for the call sign and time range the query selects,
+        # so it must give all three, as analyseQuery's queries do
+        tx_sign, start, end, output = (pattern.search(sql) for pattern in (SQL_TX_SIGN, SQL_START, SQL_END, SQL_FORMAT))
+        if not (tx_sign and start and end):
+            self.send_error(400, "Query must select tx_sign = '...' and time >= '...' AND time <= '...'")
+            return
+        if not output or output.group(1).lower() != "csvwithnames":
+            self.send_error(400, "Only FORMAT CSVWithNames is supported")
+            return
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        try:
+            start_time = datetime.strptime(start.group(1), TIME_FORMAT)
+            end_time = datetime.strptime(end.group(1), TIME_FORMAT)
+            connection = self.spot_source.database(tx_sign.group(1), start_time, end_time)
+            try:
+                cursor = connection.execute(sql[:output.start()])
+                rows = cursor.fetchall()
+                columns = [column[0] for column in cursor.description]
+            finally:
+                connection.close()
+        except (ValueError, sqlite3.Error) as e:
+            self.send_error(400, f"Bad query: {e}")
+            return
+
+        text = io.StringIO()
+        writer = csv.writer(text, lineterminator="\n")
+        writer.writerow(columns)
+        writer.writerows(rows)
+        body = text.getvalue().encode("utf-8")
+
+        encoding = self.content_encoding() if compress else None
+        compressor = self.compressor(encoding)
+        sent = compressor.compress(body) + compressor.flush() if compressor else body
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv; charset=utf-8")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(sent)))
+        self.end_headers()
+        self.wfile.write(sent)
+
+        logger.info(f"Query {tx_sign.group(1)} {start_time} - {end_time}: {len(rows)} rows, {len(body)} bytes, {len(sent)} sent ({encoding or 'identity'})")
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve synthetic spots in place of wspr.live.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument("--receivers", type=int, default=DEFAULT_RECEIVERS, help="Number of synthetic receivers")
+    parser.add_argument("--spots-per-slot", type=float, default=SPOTS_PER_SLOT, help="Average spots per 2 minute slot (response size)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before the response starts")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Bytes per response chunk")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="Seconds between response chunks")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the synthetic spots")
+    parser.add_argument("--no-compression", action="store_true", help="Send responses uncompressed whatever the client accepts")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    StandinHandler.spot_source = StandinSpots(args.receivers, args.spots_per_slot, args.seed)
+    StandinHandler.latency = args.latency
+    StandinHandler.chunk_size = args.chunk_size
+    StandinHandler.chunk_delay = args.chunk_delay
+    StandinHandler.compression = not args.no_compression
+
+    server = ThreadingHTTPServer((args.host, args.port), StandinHandler)
+    logger.info(f"Serving synthetic spots on http://{args.host}:{args.port}/wspr_downloader.php and queries on http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
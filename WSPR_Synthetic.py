@@ -0,0 +1,199 @@
+#####################################################################
+##   Name:     WSPR_Synthetic.py                                   ##
+#####################################################################
+##   Summary:                                                      ##
+##                                                                 ##
+##   Deterministic synthetic WSPR spots in the wspr.live CSV       ##
+##   schema, used by the benchmarks and the local wspr.live        ##
+##   stand-in server.                                              ##
+##                                                                 ##
+#####################################################################
+
+# -*- coding: utf-8 -*-
+
+## Imports ##
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+## Constants ##
+
+# Transmitter used for the synthetic spots (grid IO92)
+TX_SIGN = "2E0IJC"
+TX_LAT  = 52.5
+TX_LON  = -1.0
+
+# Call sign prefixes with the approximate centre and spread (degrees) of their
+# stations, and a weighting for how many WSPR receivers they have
+PREFIXES = [
+    ("G",   52.5,   -1.5,  2, 8), ("M",   52.0,   -1.0,  2, 4), ("2E",  53.0,   -2.0,  2, 2),
+    ("GM",  56.5,   -4.0,  1, 1), ("EI",  53.2,   -8.0,  1, 1), ("DL",  51.0,   10.0,  3, 10),
+    ("DK",  50.5,    9.0,  3, 3), ("F",   46.5,    2.5,  3, 5), ("EA",  40.0,   -4.0,  3, 3),
+    ("I",   42.5,   12.5,  3, 3), ("PA",  52.2,    5.5,  1, 4), ("ON",  50.7,    4.5,  1, 2),
+    ("OZ",  56.0,   10.0,  1, 2), ("SM",  60.0,   15.0,  4, 3), ("LA",  61.0,    9.0,  3, 2),
+    ("OH",  62.0,   25.0,  3, 2), ("SP",  52.0,   19.0,  2, 2), ("OK",  49.8,   15.0,  1, 2),
+    ("HB9", 46.8,    8.2,  1, 2), ("OE",  47.5,   14.0,  1, 2), ("CT",  39.5,   -8.0,  1, 1),
+    ("TF",  64.5,  -19.0,  1, 1), ("UA",  56.0,   38.0,  5, 2), ("4X",  31.5,   35.0,  1, 1),
+    ("K",   39.0,  -95.0, 10, 8), ("W",   38.0,  -90.0, 10, 8), ("N",   40.0,  -85.0, 10, 4),
+    ("VE",  50.0, -100.0,  8, 3), ("KH6", 21.0, -157.5,  1, 1), ("XE",  23.0, -102.0,  4, 1),
+    ("PY", -15.0,  -48.0,  6, 1), ("LU", -34.0,  -64.0,  4, 1), ("CE", -33.0,  -71.0,  2, 1),
+    ("VK", -27.0,  134.0, 10, 3), ("ZL", -41.0,  173.0,  3, 1), ("JA",  36.0,  138.0,  3, 3),
+    ("BY",  35.0,  105.0,  8, 1), ("HL",  37.0,  127.5,  1, 1), ("VU",  21.0,   78.0,  6, 1),
+    ("ZS", -29.0,   24.0,  4, 1)
+]
+
+## Main Code ##
+
+
+def maidenhead(lat, lon):
+    """Returns the 6 character Maidenhead locator of a position."""
+    lon = min(max(lon + 180, 0), 359.9999)
+    lat = min(max(lat + 90, 0), 179.9999)
+    return (
+        chr(ord('A') + int(lon // 20)) + chr(ord('A') + int(lat // 10)) +
+        str(int(lon % 20 // 2)) + str(int(lat % 10)) +
+        chr(ord('a') + int(lon % 2 * 12)) + chr(ord('a') + int(lat % 1 * 24))
+    )
+
+
+def _great_circle(lat1, lon1, lat2, lon2):
+    # Distance (km) and initial bearing (degrees) between two positions
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    dlon = lon2 - lon1
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    distance = 2 * 6371 * np.arcsin(np.sqrt(a))
+    bearing = np.degrees(np.arctan2(np.sin(dlon) * np.cos(lat2),
+                                    np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(dlon))) % 360
+    return distance, bearing
+
+
+def syntheticReceivers(num_receivers, seed=1):
+    """
+    Generates a population of synthetic receivers.
+
+    Receivers get real call sign prefixes placed around their country, and a second
+    nearby position (and grid) that some of them report from. Their popularity is
+    heavy-tailed, as on the real WSPR network.
+
+    Returns:
+        dict: Arrays of call signs, positions, grids and spot probabilities.
+    """
+    rng = np.random.default_rng(seed)
+
+    weights = np.array([p[4] for p in PREFIXES], dtype=float)
+    countries = rng.choice(len(PREFIXES), size=num_receivers, p=weights / weights.sum())
+    letters = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+
+    calls, lats, lons = [], [], []
+    seen = set()
+    for country in countries:
+        prefix, lat, lon, spread, _ = PREFIXES[country]
+        while True:
+            call = f"{prefix}{rng.integers(0, 10)}{''.join(rng.choice(letters, rng.integers(1, 4)))}"
+            if call not in seen:
+                break
+        seen.add(call)
+        calls.append(call)
+        lats.append(np.clip(lat + rng.normal(0, spread), -89, 89))
+        lons.append((lon + rng.normal(0, spread) + 180) % 360 - 180)
+
+    # Positions 0..n-1 are each receiver's main grid, n..2n-1 its second grid
+    lats = np.array(lats)
+    lons = np.array(lons)
+    lats = np.r_[lats, np.clip(lats + rng.normal(0, 0.3, num_receivers), -89, 89)]
+    lons = np.r_[lons, lons + rng.normal(0, 0.3, num_receivers)]
+
+    popularity = rng.pareto(1.2, num_receivers) + 1
+
+    return {
+        "calls"       : np.array(calls, dtype=object),
+        "lats"        : lats,
+        "lons"        : lons,
+        "grids"       : np.array([maidenhead(lat, lon) for lat, lon in zip(lats, lons)], dtype=object),
+        "probability" : popularity / popularity.sum()
+    }
+
+
+def pickReceivers(receivers, num_spots, rng):
+    """Returns the receiver position index of each of num_spots spots."""
+    num_receivers = len(receivers["calls"])
+    picked = rng.choice(num_receivers, size=num_spots, p=receivers["probability"])
+    second = (rng.random(num_spots) < 0.1) & (picked % 4 == 0)
+    return picked + second * num_receivers
+
+
+def spotTable(receivers, positions, times, ids, rng, tx_sign=TX_SIGN):
+    """
+    Builds spots in the wspr.live CSV schema.
+
+    Args:
+        receivers (dict): From syntheticReceivers.
+        positions (array): Receiver position index of each spot, from pickReceivers.
+        times (DatetimeIndex): Time of each spot.
+        ids (array): Spot ids.
+        rng (np.random.Generator): Source of the SNR, frequency and drift noise.
+    """
+    num_spots = len(positions)
+    num_receivers = len(receivers["calls"])
+
+    rx_lat = receivers["lats"][positions]
+    rx_lon = receivers["lons"][positions]
+    distance, azimuth = _great_circle(TX_LAT, TX_LON, rx_lat, rx_lon)
+    _, rx_azimuth = _great_circle(rx_lat, rx_lon, TX_LAT, TX_LON)
+
+    return pd.DataFrame({
+        "id": ids,
+        "time": times.strftime("%Y-%m-%d %H:%M:%S"),
+        "band": 14,
+        "rx_sign": receivers["calls"][positions % num_receivers],
+        "rx_lat": rx_lat.round(3),
+        "rx_lon": rx_lon.round(3),
+        "rx_loc": receivers["grids"][positions],
+        "tx_sign": tx_sign,
+        "tx_lat": TX_LAT,
+        "tx_lon": TX_LON,
+        "tx_loc": maidenhead(TX_LAT, TX_LON),
+        "distance": distance.astype(np.int64),
+        "azimuth": azimuth.astype(np.int64),
+        "rx_azimuth": rx_azimuth.astype(np.int64),
+        "frequency": 14_097_000 + rng.integers(0, 200, num_spots),
+        "power": 23,
+        "snr": np.clip(-5 - distance / 1000 + rng.normal(0, 6, num_spots), -33, 20).astype(np.int64),
+        "drift": rng.integers(-1, 2, num_spots),
+        "version": "2.6.1",
+        "code": 1
+    })
+
+
+def slotActivity(slot_times):
+    """Relative WSPR activity of each time, busier during daylight at the transmitter."""
+    hours = slot_times.hour + slot_times.minute / 60
+    return 1.5 + np.sin((np.asarray(hours) - 6) / 24 * 2 * np.pi)
+
+
+def syntheticSpots(num_spots, num_receivers=None, days=14, seed=1, end_time=None, tx_sign=TX_SIGN):
+    """
+    Generates a DataFrame of synthetic spots in the wspr.live CSV schema.
+
+    Receivers come from syntheticReceivers, so call signs, Maidenhead locators and
+    great-circle distances from the transmitter are consistent. Spots fall in even
+    2 minute WSPR slots over the `days` days to end_time, busier by day. The same
+    arguments always produce the same spots.
+    """
+    if num_receivers is None:
+        num_receivers = max(10, min(20_000, num_spots // 50))
+    if end_time is None:
+        end_time = datetime(2025, 8, 15)
+
+    receivers = syntheticReceivers(num_receivers, seed)
+    rng = np.random.default_rng(seed + 1)
+
+    num_slots = days * 720
+    slot_times = pd.Timestamp(end_time) - pd.to_timedelta((num_slots - np.arange(num_slots)) * 2, unit="min")
+    activity = slotActivity(slot_times)
+    slots = np.sort(rng.choice(num_slots, size=num_spots, p=activity / activity.sum()))
+
+    positions = pickReceivers(receivers, num_spots, rng)
+    ids = np.arange(num_spots, dtype=np.int64) + 9_000_000_000
+
+    return spotTable(receivers, positions, slot_times[slots], ids, rng, tx_sign)
@@ -1,14 +1,31 @@
 import os
 import configparser
-from flask import Flask, render_template, request, redirect, url_for, session, send_from_directory
+from flask import Flask, Response, render_template, request, redirect, url_for, session, send_from_directory, jsonify, abort
 import datetime
-import WSPR_Analytics
+import threading
 
-app = Flask(__name__)
-app.secret_key = "super-secret-key"  # Change for production
-
-CONFIG_FILE = 'WSPR_Analytics.conf'
+CONFIG_FILE = 'WSPR_Analytics.conf'   # Saved in each session's workspace
 DEFAULT_FILE = 'WSPR_Analytics.ini'
+LOG_FILE = os.path.join('logs', 'WSPR_Analytics.log')
+
+def analytics():
+    # The analysis engine, imported on first use. pandas, numpy and pyhamtools take most
+    # of the start-up time, and / (before a configuration is saved) and /logs don't need them
+    import WSPR_Analytics
+    return WSPR_Analytics
+
+def workspace():
+    # The session's own directory for its config, spot store and tables
+    workspace_id = session.get('workspace')
+    try:
+        return analytics().workspaceDir(workspace_id)
+    except ValueError:
+        analytics().pruneWorkspaces()
+        session['workspace'] = analytics().newWorkspace()
+        return analytics().workspaceDir(session['workspace'])
+
+def config_path():
+    return os.path.join(workspace(), CONFIG_FILE)
 
 def load_config(path):
     config = configparser.ConfigParser()
@@ -25,7 +42,7 @@ def load_config(path):
 def save_config(values):
     config = configparser.ConfigParser()
     config['default'] = values
-    with open(CONFIG_FILE, 'w') as configfile:
+    with open(config_path(), 'w') as configfile:
         config.write(configfile)
 
 def reset_config():
@@ -34,9 +51,8 @@ def reset_config():
         save_config(default)
         return default
     else:
-        return load_config(CONFIG_FILE)
+        return load_config(config_path())
 
-@app.route('/', methods=['GET', 'POST'])
 def index():
     show_menu = session.get('config_saved', False)
     dark_mode = session.get('dark_mode', False)
@@ -62,37 +78,69 @@ def index():
         elif 'dark_toggle' in request.form:
             session['dark_mode'] = not dark_mode
             return redirect(request.url)
-    config = load_config(CONFIG_FILE if show_menu else DEFAULT_FILE)
+    config = load_config(config_path() if show_menu else DEFAULT_FILE)
     return render_template('index.html', config=config, periods=period_list(), dark_mode=dark_mode, show_menu=show_menu, year=datetime.datetime.now().year)
 
-@app.route('/data', methods=['GET', 'POST'])
 def data():
     if not session.get('config_saved', False):
         return redirect(url_for('index'))
-    config = load_config(CONFIG_FILE)
+    config = load_config(config_path())
     dark_mode = session.get('dark_mode', False)
     if request.method == 'POST':
         if 'dark_toggle' in request.form:
             session['dark_mode'] = not dark_mode
             return redirect(request.url)
             
-    data_rows, error = WSPR_Analytics.getData(config['CallSign'], config['Period'])
-    
+    # Fetch in the background and show the job's progress until the spots are in
+    directory = workspace()
+    job = analytics().getFetchJob(request.args.get('job', ''))
+    if job is None or job.directory != directory:
+        job = analytics().submitFetch(config['CallSign'], config['Period'], directory)
+        return redirect(url_for('data', job=job.job_id))
+
+    # Render only the first page; the table fetches the rest from /data/rows
+    page = None
+    error = job.error
+    if job.status == 'done':
+        page, error = analytics().getSpotPage(directory=directory)
+
     return render_template(
         'data.html',
-        data_rows=data_rows,
+        job=job.info(),
+        page=page,
         error=error,
         dark_mode=dark_mode,
         show_menu=True,
         year=datetime.datetime.now().year
     )
 
-@app.route('/analysis', methods=['GET', 'POST'])
+def fetch_job(job_id):
+    # Status and progress of a background fetch
+    job = analytics().getFetchJob(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job.info())
+
+def data_rows():
+    # One page of the fetched spots as JSON, e.g. /data/rows?page=2&sort=distance&desc=1&filter_rx_sign=G4
+    filters = {key[len('filter_'):]: value for key, value in request.args.items() if key.startswith('filter_')}
+    page, error = analytics().getSpotPage(
+        page=request.args.get('page', 1, type=int),
+        page_size=request.args.get('page_size', analytics().DATA_PAGE_SIZE, type=int),
+        sort=request.args.get('sort') or None,
+        descending=request.args.get('desc', '0') not in ('0', 'false', ''),
+        filters=filters,
+        directory=workspace()
+    )
+    if error:
+        return jsonify({'error': error}), 400
+    return jsonify(page)
+
 def analysis():
     if not session.get('config_saved', False):
         return redirect(url_for('index'))
     
-    config = load_config(CONFIG_FILE)
+    config = load_config(config_path())
 
     dark_mode = session.get('dark_mode', False)
 
@@ -106,7 +154,12 @@ def analysis():
     except Exception:
         num_bins = 8
 
-    summaryData, frequencyList, logarithmicList, callSignList, distanceList, countryList, hourlyList, error = WSPR_Analytics.analyseData(num_bins)
+    # Long periods are aggregated by wspr.live rather than from the downloaded spots
+    if analytics().useQuery(config['Period']):
+        results = analytics().analyseQuery(config['CallSign'], config['Period'], num_bins, workspace())
+    else:
+        results = analytics().analyseData(num_bins, workspace())
+    summaryData, frequencyList, logarithmicList, callSignList, distanceList, countryList, hourlyList, error = results
 
     try:
         top_stations_count = int(config.get('TopStations', 10))
@@ -160,7 +213,6 @@ def analysis():
         year=datetime.datetime.now().year
     )
 
-@app.route('/visualise', methods=['GET', 'POST'])
 def visualise():
     if not session.get('config_saved', False):
         return redirect(url_for('index'))
@@ -169,7 +221,7 @@ def visualise():
         if 'dark_toggle' in request.form:
             session['dark_mode'] = not dark_mode
             return redirect(request.url)
-    png_path = WSPR_Analytics.visualiseData()
+    png_path = analytics().visualiseData()
     return render_template(
         'visualise.html', 
         png_file=png_path, 
@@ -177,16 +229,12 @@ def visualise():
         show_menu=True, 
         year=datetime.datetime.now().year)
 
-@app.route('/static/<path:filename>')
 def staticfiles(filename):
     return send_from_directory('static', filename)
 
-@app.route('/logs')
 def logs():
-    import os
-    log_path = os.path.join('logs', 'WSPR_Analytics.log')
     try:
-        with open(log_path, 'r', encoding='utf-8', errors='replace') as f:
+        with open(LOG_FILE, 'r', encoding='utf-8', errors='replace') as f:
             log_contents = f.read()
     except Exception as e:
         log_contents = f"Could not open log file: {e}"
@@ -199,17 +247,59 @@ def logs():
         year=datetime.datetime.now().year
     )
 
-@app.route('/export-data')
 def export_data():
-    file_path = "data/WSPR_Analytics.csv"
+    file_path = analytics().exportSpots(workspace())
+    if file_path is None:
+        abort(404, description="No data has been fetched yet.")
     directory = os.path.dirname(file_path)
     filename = os.path.basename(file_path)
     return send_from_directory(directory, filename, as_attachment=True)
 
+def country_cache():
+    # Hit/miss/eviction counters of the shared call sign cache
+    return jsonify(analytics().countryCacheStats())
+
+def analysis_cache():
+    # Hit/miss/eviction counters of the analysis result cache
+    return jsonify(analytics().analysisCacheStats())
+
+def metrics():
+    # Stage latency histograms, rows, bytes and cache counters for Prometheus to scrape
+    return Response(analytics().metricsText(), mimetype='text/plain; version=0.0.4')
+
 def period_list():
     return [
         "10 minutes", "30 minutes", "1 hour", "3 hours", "6 hours", "12 hours", "1 day", "2 days", "3 days", "5 days", "7 days", "14 days"
     ]
 
+def create_app(preload=True):
+    """
+    Creates the WSPR Analytics web app.
+
+    The analysis engine is imported when a route first needs it, so the app starts
+    answering / and /logs straight away. With preload, it is imported on a background
+    thread as soon as the app is created, so the first /data or /analysis request
+    doesn't wait for all of it.
+    """
+    app = Flask(__name__)
+    app.secret_key = "super-secret-key"  # Change for production
+
+    app.add_url_rule('/', view_func=index, methods=['GET', 'POST'])
+    app.add_url_rule('/data', view_func=data, methods=['GET', 'POST'])
+    app.add_url_rule('/jobs/<job_id>', view_func=fetch_job)
+    app.add_url_rule('/data/rows', view_func=data_rows)
+    app.add_url_rule('/analysis', view_func=analysis, methods=['GET', 'POST'])
+    app.add_url_rule('/visualise', view_func=visualise, methods=['GET', 'POST'])
+    app.add_url_rule('/static/<path:filename>', view_func=staticfiles)
+    app.add_url_rule('/logs', view_func=logs)
+    app.add_url_rule('/export-data', view_func=export_data)
+    app.add_url_rule('/country-cache', view_func=country_cache)
+    app.add_url_rule('/analysis-cache', view_func=analysis_cache)
+    app.add_url_rule('/metrics', view_func=metrics)
+
+    if preload:
+        threading.Thread(target=analytics, name="preload", daemon=True).start()
+    return app
+
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    create_app().run(debug=True)
\ No newline at end of file
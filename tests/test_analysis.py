@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import WSPR_Analytics
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    # Keep the tables the analysis functions save out of data/
+    monkeypatch.setattr(WSPR_Analytics, "DATA_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _spots_without_locators(num_spots=40):
+    return pd.DataFrame({
+        "rx_sign"  : pd.Categorical(["G4ABC", "K1ABC"] * (num_spots // 2)),
+        "rx_loc"   : pd.Categorical([np.nan] * num_spots, categories=[]),
+        "distance" : np.arange(num_spots, dtype=np.int32) * 100 + 5,
+        "time"     : pd.date_range("2026-10-01", periods=num_spots, freq="30min")
+    })
+
+
+def test_call_sign_count_without_locators():
+    spots = pd.DataFrame({"rx_sign": ["G4ABC"], "rx_loc": [np.nan], "distance": [1], "time": ["2026-10-01 00:00:00"]})
+    table = WSPR_Analytics.getCallSignCount(spots)
+    assert table.to_dict("records") == [{"rx_sign": "G4ABC", "Count": 1, "gridRef": ""}]
+
+
+def test_modal_codes_without_values():
+    group_codes = np.array([0, 1, 1])
+    value_codes = np.array([-1, -1, -1])
+    assert WSPR_Analytics._modal_codes(group_codes, value_codes, 2, 0).tolist() == [-1, -1]
+
+
+@pytest.mark.parametrize("workers", [None, 1, 4])
+def test_engines_without_locators(workers):
+    spots = _spots_without_locators()
+    if workers is None:
+        tables = WSPR_Analytics.analyseFused(spots, 4)
+    else:
+        tables = WSPR_Analytics.analyseStages(spots, 4, workers)
+    summary, _, _, distances, call_signs, _, _ = tables
+
+    assert summary[0] == {"label": "Total spots", "value": 40}
+    assert call_signs.to_dict("records") == [
+        {"rx_sign": "G4ABC", "Count": 20, "gridRef": ""},
+        {"rx_sign": "K1ABC", "Count": 20, "gridRef": ""}
+    ]
+    assert distances["rx_loc"].isna().all()
@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+import app
+import WSPR_Analytics
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(WSPR_Analytics, "WORKSPACE_DIR", str(tmp_path / "workspaces"))
+    return app.create_app(preload=False).test_client()
+
+
+def test_export_before_any_fetch_is_not_found(client):
+    response = client.get("/export-data")
+    assert response.status_code == 404
+    assert b"No data has been fetched yet." in response.data
+
+
+def test_export_after_a_fetch(client):
+    client.get("/export-data")   # Gives the session its workspace
+    with client.session_transaction() as session:
+        directory = WSPR_Analytics.workspaceDir(session["workspace"])
+    csv_path = os.path.join(directory, f"{WSPR_Analytics.DATAFILE_NAME}.{WSPR_Analytics.FMT_CSV}")
+    with open(csv_path, "w", encoding="utf-8") as f:
+        f.write("id,time,rx_sign\n1,2026-10-01 12:00:00,G4ABC\n")
+    WSPR_Analytics.storeSpots(csv_path, directory)
+    if os.path.exists(csv_path):
+        os.remove(csv_path)   # So the export is written from the spot store
+
+    response = client.get("/export-data")
+    assert response.status_code == 200
+    assert response.data.splitlines() == [b"id,time,rx_sign", b"1,2026-10-01 12:00:00,G4ABC"]
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import WSPR_Analytics
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    # Keep the tables the analysis functions save out of data/
+    monkeypatch.setattr(WSPR_Analytics, "DATA_DIR", str(tmp_path))
+    return tmp_path
+
+
+# The tables as the original pd.qcut and pd.cut code built them. frequencyBinning and
+# logarithmicBinning reproduce pandas' edges and label rounding without calling them
+
+def _qcut_table(distance, num_bins):
+    bins = pd.qcut(distance, q=num_bins)
+    bin_labels = [f"{int(interval.left)}-{int(interval.right)} km" for interval in bins.cat.categories]
+    counts = pd.qcut(distance, q=num_bins, labels=bin_labels).value_counts().sort_index()
+    return pd.DataFrame({"Distance Range": counts.index, "Number of Spots": counts.values})
+
+
+def _cut_table(distance, num_bins):
+    distance_log = np.log1p(distance)
+    log_bins = np.linspace(distance_log.min(), distance_log.max(), num_bins + 1)
+    bins = pd.cut(distance_log, bins=log_bins, right=False)
+    bin_labels = [f"{int(np.expm1(interval.left))}-{int(np.expm1(interval.right))} km" for interval in bins.cat.categories]
+    counts = pd.cut(distance_log, bins=log_bins, right=False, labels=bin_labels).value_counts().sort_index()
+    return pd.DataFrame({"Distance Range": counts.index, "Number of Spots": counts.values})
+
+
+def _distances(kind, num_spots, seed):
+    rng = np.random.default_rng(seed)
+    if kind == "lognormal":
+        distance = rng.lognormal(7, 1.2, num_spots)
+    elif kind == "uniform":
+        distance = rng.uniform(0, 20000, num_spots)
+    elif kind == "ties":
+        distance = rng.choice([0, 12, 12, 250, 1800, 1800, 1800, 7500], num_spots)
+    elif kind == "steps":
+        distance = np.arange(num_spots) * 37   # Quantiles land between order statistics
+    elif kind == "few":
+        distance = rng.choice([5, 900], num_spots)   # Too few values for most bin counts
+    else:
+        distance = np.full(num_spots, 1234)
+    return pd.Series(np.round(distance).astype(np.int32), name="distance")
+
+
+def _compare(ours, theirs, distance, num_bins):
+    try:
+        expected = theirs(distance, num_bins)
+    except ValueError:
+        with pytest.raises(ValueError):
+            ours(pd.DataFrame({"distance": distance}), num_bins)
+        return
+    table = ours(pd.DataFrame({"distance": distance}), num_bins)
+    assert list(table["Distance Range"].astype(str)) == list(expected["Distance Range"].astype(str))
+    assert list(table["Number of Spots"]) == list(expected["Number of Spots"])
+
+
+CASES = [(kind, num_spots, seed) for kind in ("lognormal", "uniform", "ties", "steps", "few", "constant")
+         for num_spots in (1, 7, 8, 29, 500) for seed in (0, 1)]
+BINS  = [1, 2, 5, 7, 8, 12, 14, 20]   # 7 and 14 bins of 8 or 29 spots need qcut's nudged quantiles
+
+
+@pytest.mark.parametrize("num_bins", BINS)
+@pytest.mark.parametrize("kind, num_spots, seed", CASES)
+def test_frequency_binning_matches_qcut(kind, num_spots, seed, num_bins):
+    _compare(WSPR_Analytics.frequencyBinning, _qcut_table, _distances(kind, num_spots, seed), num_bins)
+
+
+@pytest.mark.parametrize("num_bins", BINS)
+@pytest.mark.parametrize("kind, num_spots, seed", CASES)
+def test_logarithmic_binning_matches_cut(kind, num_spots, seed, num_bins):
+    _compare(WSPR_Analytics.logarithmicBinning, _cut_table, _distances(kind, num_spots, seed), num_bins)
+
+
+def test_duplicate_quantile_edges_are_an_error():
+    with pytest.raises(ValueError):
+        _qcut_table(_distances("few", 500, 0), 8)
+    with pytest.raises(ValueError):
+        WSPR_Analytics.frequencyBinning(pd.DataFrame({"distance": _distances("few", 500, 0)}), 8)
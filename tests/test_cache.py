@@ -0,0 +1,92 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import WSPR_Analytics
+
+
+def _delta(path, times, ids):
+    pd.DataFrame({"id": ids, "time": times, "rx_sign": [f"G{i % 7}ABC" for i in ids]}).to_csv(path, index=False)
+
+
+def _buckets(directory):
+    return {name: pd.read_csv(os.path.join(directory, name), dtype=str) for name in WSPR_Analytics._bucket_files(directory)}
+
+
+@pytest.mark.parametrize("shuffle", [False, True])
+def test_chunked_merge_matches_whole_merge(tmp_path, monkeypatch, shuffle):
+    rng = np.random.default_rng(1)
+    times = pd.date_range("2026-10-01 22:00", "2026-10-04 02:00", freq="2min")
+    times = times.repeat(rng.integers(0, 4, len(times)))
+    ids = np.arange(len(times))
+    if shuffle:
+        order = rng.permutation(len(times))
+        times, ids = times[order], ids[order]
+    times = times.strftime(WSPR_Analytics.TIME_FORMAT)
+
+    results = []
+    for chunk_rows in (len(times) + 1, 37):
+        directory = tmp_path / str(chunk_rows)
+        directory.mkdir()
+        # A bucket already held for the first day, with a spot the delta replaces
+        first = int(np.argmin(times))
+        _delta(directory / "2026-10-01.csv", ["2026-10-01 21:00:00", times[first]], [-1, ids[first]])
+
+        monkeypatch.setattr(WSPR_Analytics, "MERGE_CHUNK_ROWS", chunk_rows)
+        _delta(directory / "delta.csv", times, ids)
+        assert WSPR_Analytics._merge_into_buckets(str(directory), str(directory / "delta.csv")) == len(times)
+        results.append(_buckets(str(directory)))
+
+    whole, chunked = results
+    assert list(whole) == ["2026-10-01.csv", "2026-10-02.csv", "2026-10-03.csv", "2026-10-04.csv"]
+    assert list(whole) == list(chunked)
+    for name in whole:
+        pd.testing.assert_frame_equal(whole[name], chunked[name])
+    assert len(pd.concat(whole.values())) == len(times) + 1
+
+
+def test_short_window_keeps_longer_windows_spots(tmp_path, monkeypatch):
+    # Spots every hour, from a fetchSpotSlices that records the ranges asked for
+    fetched = []
+
+    def fetch(call_sign, start_time, end_time, directory, file_path, progress=None):
+        fetched.append((start_time, end_time))
+        times = pd.date_range(pd.Timestamp(start_time).ceil("h"), end_time, freq="h").strftime(WSPR_Analytics.TIME_FORMAT)
+        _delta(file_path, list(times), [int(t.replace("-", "").replace(" ", "").replace(":", "")) for t in times])
+        return 1
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(WSPR_Analytics, "fetchSpotSlices", fetch)
+    now = pd.Timestamp("2026-10-10 12:00").to_pydatetime()
+    day = pd.Timedelta(days=1).to_pytimedelta()
+
+    directory = WSPR_Analytics.updateSpotCache("G0ABC", now - 3 * day, now)
+    assert fetched == [(now - 3 * day, now)]
+
+    # A shorter window only fetches the tail, and keeps the older buckets
+    fetched.clear()
+    WSPR_Analytics.updateSpotCache("G0ABC", now - day, now)
+    assert fetched == [(now - WSPR_Analytics.CACHE_REFETCH, now)]
+    assert WSPR_Analytics._read_coverage(directory, WSPR_Analytics._fetch_columns()) == (now - 3 * day, now)
+    assert WSPR_Analytics._bucket_files(directory)[0] == "2026-10-07.csv"
+
+    # A longer window fetches only the missing head, not the whole window again
+    fetched.clear()
+    WSPR_Analytics.updateSpotCache("G0ABC", now - 5 * day, now)
+    assert fetched == [(now - 5 * day, now - 3 * day), (now - WSPR_Analytics.CACHE_REFETCH, now)]
+    assert WSPR_Analytics._read_coverage(directory, WSPR_Analytics._fetch_columns()) == (now - 5 * day, now)
+    spots = pd.concat(_buckets(directory).values())
+    assert len(spots) == spots["id"].nunique() == 5 * 24 + 1
+
+    # Buckets older than CACHE_RETENTION are evicted
+    later = now + 12 * day
+    WSPR_Analytics.updateSpotCache("G0ABC", later - 13 * day, later)
+    assert WSPR_Analytics._bucket_files(directory)[0] == "2026-10-08.csv"
+    assert WSPR_Analytics._read_coverage(directory, WSPR_Analytics._fetch_columns())[0] == pd.Timestamp("2026-10-08").to_pydatetime()
+
+
+def test_call_sign_case_shares_one_cache():
+    assert WSPR_Analytics.spotCacheDir("g0abc/p") == WSPR_Analytics.spotCacheDir("G0ABC/P")
+    assert WSPR_Analytics._spot_cache_lock("g0abc") is WSPR_Analytics._spot_cache_lock("G0ABC")
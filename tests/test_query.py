@@ -0,0 +1,113 @@
+import os
+import threading
+from datetime import datetime
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import WSPR_Analytics
+import WSPR_Standin
+
+CALL_SIGN = "2E0IJC"
+PERIOD    = "1 day"
+NOW       = datetime(2026, 10, 1, 12, 0, 0)   # On a 2 minute slot, so both windows are the same
+
+
+class FixedClock(datetime):
+    @classmethod
+    def utcnow(cls):
+        return NOW
+
+
+@pytest.fixture
+def standin(monkeypatch, tmp_path):
+    # The stand-in on a free port, serving both the downloads and the queries
+    WSPR_Analytics.loadCountryIndex()   # While resources/ is still the working directory's
+    monkeypatch.chdir(tmp_path)
+
+    monkeypatch.setattr(WSPR_Standin.StandinHandler, "spot_source", WSPR_Standin.StandinSpots(num_receivers=500))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), WSPR_Standin.StandinHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setattr(WSPR_Analytics, "WSPR_URL", url)
+    monkeypatch.setattr(WSPR_Analytics, "WSPR_SQL_URL", url)
+    monkeypatch.setattr(WSPR_Analytics, "FETCH_RATE_LIMIT", 0)
+    monkeypatch.setattr(WSPR_Analytics, "datetime", FixedClock)
+    yield str(tmp_path / "workspace")
+
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("number_of_bins", [8, 12])
+def test_query_tables_match_downloaded_spots(standin, number_of_bins):
+    spots, error = WSPR_Analytics.getData(CALL_SIGN, PERIOD, directory=standin)
+    assert error is None
+    local = WSPR_Analytics.analyseData(number_of_bins, standin)
+    query = WSPR_Analytics.analyseQuery(CALL_SIGN, PERIOD, number_of_bins, standin)
+    assert local[-1] is None and query[-1] is None
+
+    summary, freq_bins, log_bins, _, _, _, hourly, _ = query
+    assert summary[0] == {"label": "Total spots", "value": len(spots)}
+    assert len(freq_bins) == number_of_bins and len(hourly) > 0
+    assert freq_bins == local[1]
+    assert log_bins == local[2]
+    assert hourly == local[6]
+    assert WSPR_Analytics._stage_metrics.stats()["querySpots"]["count"] >= 3
+
+
+def test_invalid_call_sign_is_reported(standin):
+    spots, error = WSPR_Analytics.getData("Call Sign", PERIOD, directory=standin)
+    assert spots is None
+    assert error == "Invalid call sign: Call Sign"
+    assert not os.path.exists(WSPR_Analytics.CACHE_DIR)
+
+
+def test_only_newest_fetch_stores_spots(standin, monkeypatch):
+    # Hold both jobs until the second has been submitted
+    gate = threading.Event()
+    update = WSPR_Analytics.updateSpotCache
+
+    def gated_update(*args, **kwargs):
+        gate.wait(10)
+        return update(*args, **kwargs)
+
+    monkeypatch.setattr(WSPR_Analytics, "updateSpotCache", gated_update)
+    older = WSPR_Analytics.submitFetch(CALL_SIGN, "2 days", standin)
+    newer = WSPR_Analytics.submitFetch(CALL_SIGN, PERIOD, standin)
+    gate.set()
+    assert older.done.wait(30) and newer.done.wait(30)
+
+    assert older.status == "failed" and older.error == "Superseded by a newer fetch for this workspace."
+    assert newer.status == "done" and newer.rows
+    assert len(WSPR_Analytics.readSpots(directory=standin)) == newer.rows
+    assert not os.path.exists(os.path.join(standin, "WSPR_Analytics.csv.part"))
+    assert not WSPR_Analytics._newest_fetches and not WSPR_Analytics._active_fetches
+
+
+def test_sliced_fetch_counts_rows_and_rate_limit_once(standin, monkeypatch):
+    waits = []
+    limiter = WSPR_Analytics._rate_limiter
+    monkeypatch.setattr(WSPR_Analytics, "_rate_limiter", lambda url: waits.append(url) or limiter(url))
+
+    received = []
+    os.makedirs(standin)
+    delta_path = os.path.join(standin, "delta.csv")
+    end_time = NOW
+    start_time = end_time - WSPR_Analytics.FETCH_SLICE * 5
+    slices = WSPR_Analytics.fetchSpotSlices(CALL_SIGN, start_time, end_time, standin, delta_path,
+                                            lambda num_bytes, num_rows: received.append(num_rows))
+
+    assert slices == 5 and len(waits) == 1
+    with open(delta_path, "r", encoding="utf-8") as f:
+        assert sum(received) == sum(1 for _ in f) - 1
+
+
+def test_call_sign_in_lower_case_uses_the_same_cache(standin):
+    lower, error = WSPR_Analytics.getData(CALL_SIGN.lower(), PERIOD, directory=standin)
+    assert error is None
+    upper, error = WSPR_Analytics.getData(CALL_SIGN, PERIOD, directory=standin)
+    assert error is None and len(lower) == len(upper)
+    assert os.listdir(WSPR_Analytics.CACHE_DIR) == [CALL_SIGN]
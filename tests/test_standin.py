@@ -0,0 +1,26 @@
+import time
+from datetime import datetime
+
+import pytest
+
+import WSPR_Standin
+
+
+@pytest.fixture
+def new_york(monkeypatch):
+    # A machine clock that isn't UTC
+    if not hasattr(time, "tzset"):
+        pytest.skip("time.tzset is not available")
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_spots_stay_in_window_off_utc(new_york):
+    start, end = datetime(2026, 10, 1, 0, 0), datetime(2026, 10, 1, 0, 10)
+    spots = WSPR_Standin.StandinSpots().spots("K1ABC", start, end)
+    assert len(spots)
+    assert spots["time"].min() >= start.strftime(WSPR_Standin.TIME_FORMAT)
+    assert spots["time"].max() <= end.strftime(WSPR_Standin.TIME_FORMAT)